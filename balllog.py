@@ -0,0 +1,91 @@
+"""
+Ball-by-Ball Log
+
+Per-match append-only log of deliveries so live clients can fetch only the
+balls they have not seen yet. Every new delivery gets a sequence number
+(1, 2, 3, ...) equal to its position in the log, so a delta is a list slice
+after the client's cursor instead of a re-download of the whole `balls` array.
+
+Deliveries are identified by the provider's ball id when present, otherwise
+by (scoreboard/inning, over, ball); already-logged deliveries are skipped.
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+Ball = Dict[str, Any]
+
+
+def ball_key(ball: Ball) -> Hashable:
+    if ball.get("id") is not None:
+        return ("id", ball["id"])
+    return (str(ball.get("scoreboard") or ball.get("inning") or ""), str(ball.get("over")), str(ball.get("ball")))
+
+
+def _ball_order(ball: Ball) -> Tuple:
+    def num(value: Any) -> float:
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return 0.0
+
+    return (str(ball.get("scoreboard") or ball.get("inning") or ""), num(ball.get("over")), num(ball.get("ball")), num(ball.get("id")))
+
+
+def is_wicket(ball: Ball) -> bool:
+    score = ball.get("score")
+    if isinstance(score, dict):
+        return bool(score.get("is_wicket") or score.get("is_out"))
+    return bool(ball.get("wicket")) or str(score or "").strip().upper() in ("W", "OUT", "WICKET")
+
+
+class BallLog:
+    """Append-only delivery log for one match"""
+
+    def __init__(self):
+        self.balls: List[Ball] = []
+        self._seen: set = set()
+        self._last_batch: Optional[list] = None
+
+    @property
+    def cursor(self) -> int:
+        return len(self.balls)
+
+    def ingest(self, balls: Iterable[Ball]) -> List[Ball]:
+        """Append unseen deliveries in playing order and return them with their `seq`"""
+        if balls is self._last_batch:
+            # Same cached payload as last time; nothing new to scan
+            return []
+        self._last_batch = balls if isinstance(balls, list) else None
+        new = [b for b in balls if isinstance(b, dict) and ball_key(b) not in self._seen]
+        added = []
+        for ball in sorted(new, key=_ball_order):
+            key = ball_key(ball)
+            if key in self._seen:
+                continue
+            self._seen.add(key)
+            entry = {**ball, "seq": len(self.balls) + 1}
+            self.balls.append(entry)
+            added.append(entry)
+        return added
+
+    def since(self, after: int, limit: Optional[int] = None) -> List[Ball]:
+        end = None if limit is None else after + limit
+        return self.balls[after:end]
+
+
+class BallLogs:
+    """Ball logs for the most recently used `max_matches` matches, keyed by (provider, match_id)"""
+
+    def __init__(self, max_matches: int = 64):
+        self.max_matches = max_matches
+        self._logs: "OrderedDict[Hashable, BallLog]" = OrderedDict()
+
+    def get(self, match_id: Hashable) -> BallLog:
+        log = self._logs.get(match_id)
+        if log is None:
+            log = self._logs[match_id] = BallLog()
+            while len(self._logs) > self.max_matches:
+                self._logs.popitem(last=False)
+        self._logs.move_to_end(match_id)
+        return log
@@ -0,0 +1,76 @@
+"""
+Benchmark: hedged upstream requests against a stub with a slow tail
+
+The stub answers in ~20ms, except for a small share of requests that take
+500ms (a slow upstream replica or GC pause). The same workload is run through
+upstream.http_get_async with hedging off and on; with hedging, a call still
+pending at the host's observed p95 sends a second request and takes the first
+answer, which should cut p99 to roughly p95 + 20ms at a few percent more calls.
+
+Usage:
+    python benchmarks/hedging_latency.py [requests] [slow_share]
+"""
+
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import upstream  # noqa: E402
+from benchmarks.stub_provider import StubProvider  # noqa: E402
+
+CONCURRENCY = 8
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def run(url, n, hedge):
+    latencies = []
+    sem = asyncio.Semaphore(CONCURRENCY)
+
+    async def one(i):
+        async with sem:
+            t0 = time.perf_counter()
+            r = await upstream.http_get_async(f"{url}/fixtures/{i}", hedge=hedge)
+            r.raise_for_status()
+            latencies.append(time.perf_counter() - t0)
+
+    await asyncio.gather(*(one(i) for i in range(n)))
+    await upstream.aclose_clients()
+    return latencies
+
+
+def report(label, latencies, hits, n):
+    ms = [x * 1000 for x in latencies]
+    print(
+        f"{label:<10} p50={percentile(ms, 0.50):6.1f}ms  p95={percentile(ms, 0.95):6.1f}ms  "
+        f"p99={percentile(ms, 0.99):6.1f}ms  mean={statistics.mean(ms):6.1f}ms  upstream calls={hits} ({hits / n:.3f}/req)"
+    )
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    slow_share = float(sys.argv[2]) if len(sys.argv) > 2 else 0.03
+    rng = random.Random(42)
+    with StubProvider(delay=lambda: 0.5 if rng.random() < slow_share else 0.02) as stub:
+        upstream.HEDGE_ENABLED = False
+        baseline = asyncio.run(run(stub.base_url, n, hedge=False))
+        report("baseline", baseline, sum(stub.hits.values()), n)
+
+        stub.hits.clear()
+        upstream._latency.clear()
+        upstream.HEDGE_ENABLED = True
+        hedged = asyncio.run(run(stub.base_url, n, hedge=True))
+        report("hedged", hedged, sum(stub.hits.values()), n)
+        print("hedge stats:", upstream.hedge_stats())
+
+
+if __name__ == "__main__":
+    main()
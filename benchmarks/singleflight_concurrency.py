@@ -0,0 +1,53 @@
+"""
+Concurrency check: single-flight coalescing of identical upstream calls
+
+Points SportMonks at a local stub with 200ms injected latency, then fires a
+burst of concurrent identical sportmonks_get_async calls (one event loop) and
+sportmonks_get calls (a thread pool). Each burst should reach the stub once.
+
+Usage:
+    python benchmarks/singleflight_concurrency.py [concurrency]
+"""
+
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stub_provider import StubProvider  # noqa: E402
+
+INCLUDE = {"include": "localteam,visitorteam,venue,runs,batting,bowling,lineup,balls,scoreboards"}
+
+
+async def async_burst(main, n):
+    results = await asyncio.gather(*[main.sportmonks_get_async("fixtures/10001", dict(INCLUDE)) for _ in range(n)])
+    await main.aclose_clients()
+    return results
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    with StubProvider(delay=lambda: 0.2) as stub:
+        os.environ["CRICKET_API_KEY"] = "bench"
+        os.environ["SPORTMONKS_BASE"] = stub.base_url
+        import main as app_main
+
+        t0 = time.perf_counter()
+        results = asyncio.run(async_burst(app_main, n))
+        print(f"async: {len(results)} callers, {stub.hits['/fixtures/10001']} upstream hit(s), {time.perf_counter() - t0:.3f}s")
+        assert stub.hits["/fixtures/10001"] == 1
+
+        stub.hits.clear()
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=min(n, 64)) as pool:
+            results = list(pool.map(lambda _: app_main.sportmonks_get("fixtures/10001", dict(INCLUDE)), range(min(n, 64))))
+        print(f"sync:  {len(results)} callers, {stub.hits['/fixtures/10001']} upstream hit(s), {time.perf_counter() - t0:.3f}s")
+        assert stub.hits["/fixtures/10001"] == 1
+        app_main.close_sessions()
+
+
+if __name__ == "__main__":
+    main()
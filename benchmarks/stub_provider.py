@@ -0,0 +1,62 @@
+"""
+Local stub provider for benchmarks
+
+A threaded HTTP/1.1 server that answers every GET with a small SportMonks-like
+JSON body. Latency can be injected per request and hits are counted per path
+so scripts can check how many calls actually reached the "provider".
+"""
+
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+from urllib.parse import urlsplit
+
+PAYLOAD = json.dumps({"data": [{"id": i, "status": "LIVE"} for i in range(20)]}).encode()
+
+
+class StubProvider:
+    def __init__(self, delay: Optional[Callable[[], float]] = None):
+        self.delay = delay
+        self.hits: Counter = Counter()
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                with stub._lock:
+                    stub.hits[urlsplit(self.path).path] += 1
+                if stub.delay is not None:
+                    time.sleep(stub.delay())
+                try:
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(PAYLOAD)))
+                    self.end_headers()
+                    self.wfile.write(PAYLOAD)
+                except (BrokenPipeError, ConnectionResetError):
+                    # Client gave up on this request (e.g. a cancelled hedge)
+                    self.close_connection = True
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def __enter__(self) -> "StubProvider":
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
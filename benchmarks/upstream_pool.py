@@ -0,0 +1,52 @@
+"""
+Benchmark: bare requests.get vs pooled upstream sessions
+
+Starts a local HTTP/1.1 stub server that mimics a small provider JSON response
+and times N sequential GETs through both paths. Every bare requests.get opens
+a new connection; upstream.http_get reuses the host's keep-alive pool.
+
+Usage:
+    python benchmarks/upstream_pool.py [requests]
+"""
+
+import os
+import statistics
+import sys
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import upstream  # noqa: E402
+from benchmarks.stub_provider import StubProvider  # noqa: E402
+
+
+def timed(fn, url, n):
+    samples = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        fn(url).json()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return samples
+
+
+def report(label, samples):
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"{label:<22} p50={statistics.median(samples):.3f}ms p95={p95:.3f}ms total={sum(samples):.1f}ms")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    with StubProvider() as stub:
+        url = f"{stub.base_url}/livescores"
+        try:
+            report("requests.get (bare)", timed(lambda u: requests.get(u, timeout=15), url, n))
+            report("upstream.http_get", timed(upstream.http_get, url, n))
+        finally:
+            upstream.close_sessions()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Upstream Circuit Breakers
+
+One breaker per provider endpoint (numeric path segments collapsed, so
+`fixtures/123` and `fixtures/456` share `fixtures/{id}`). After
+`failure_threshold` consecutive failures the breaker opens and calls fail
+immediately with CircuitOpen instead of each waiting out the provider
+timeout; callers answer from last-known-good or sample data. After
+`reset_timeout` seconds one probe call is let through (half-open): success
+closes the breaker, failure opens it again.
+
+Only provider trouble counts as a failure: transport errors, timeouts, 5xx
+and 429. A 4xx such as 404 means the provider is healthy and answered.
+"""
+
+import asyncio
+import re
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpen(HTTPException):
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(
+            status_code=503,
+            detail=f"{name} temporarily unavailable",
+            headers={"Retry-After": str(max(1, int(retry_after + 0.999)))},
+        )
+        self.name = name
+
+
+def is_failure(exc: Exception) -> bool:
+    if isinstance(exc, HTTPException):
+        return exc.status_code >= 500 or exc.status_code == 429
+    return True
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 ignore: Tuple[type, ...] = ()):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        # Exceptions raised before reaching the provider (e.g. local rate budgets)
+        self.ignore = ignore
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.opens = 0
+        self.rejected = 0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """Raise CircuitOpen unless a call may go to the provider now"""
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            remaining = self.opened_at + self.reset_timeout - time.monotonic()
+            if self.state == OPEN and remaining <= 0:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return
+            self.rejected += 1
+            raise CircuitOpen(self.name, max(remaining, 1.0))
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.opens += 1
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def _record(self, exc: Optional[Exception]):
+        if exc is None or not is_failure(exc):
+            self.record_success()
+        else:
+            self.record_failure()
+
+    async def call(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        self.before_call()
+        try:
+            result = await fn()
+        except (asyncio.CancelledError, *self.ignore):
+            self._release()
+            raise
+        except Exception as e:
+            self._record(e)
+            raise
+        self._record(None)
+        return result
+
+    def call_sync(self, fn: Callable[[], Any]) -> Any:
+        self.before_call()
+        try:
+            result = fn()
+        except self.ignore:
+            self._release()
+            raise
+        except Exception as e:
+            self._record(e)
+            raise
+        self._record(None)
+        return result
+
+    def _release(self):
+        # The call never reached the provider; let the next one probe instead
+        with self._lock:
+            self._probing = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {"state": self.state, "failures": self.failures, "opens": self.opens, "rejected": self.rejected}
+
+
+_ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+
+def endpoint_name(provider: str, path: str) -> str:
+    return provider + ":" + _ID_SEGMENT.sub("/{id}", "/" + path.strip("/"))
+
+
+class Breakers:
+    """Breakers created on first use, one per provider endpoint"""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, ignore: Tuple[type, ...] = ()):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.ignore = ignore
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, provider: str, path: str) -> CircuitBreaker:
+        name = endpoint_name(provider, path)
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            breaker = self._breakers.setdefault(
+                name, CircuitBreaker(name, self.failure_threshold, self.reset_timeout, self.ignore)
+            )
+        return breaker
+
+    def stats(self) -> Dict[str, Any]:
+        return {name: b.stats() for name, b in self._breakers.items()}
@@ -0,0 +1,185 @@
+"""
+In-Process Response Cache
+
+Small TTL + LRU cache used in front of upstream provider calls so repeated
+requests for the same data are served from memory instead of spending
+provider quota. Entries carry their own TTL, the cache is bounded by entry
+count with least-recently-used eviction, and hit/miss counters are kept for
+the /api/cache/stats endpoint.
+
+get_or_load adds stale-while-revalidate: once an entry's TTL has passed it
+is still served for up to `max_stale` more seconds while a single background
+refresh replaces it, so callers never wait on a slow provider for data we
+already have. Past that bound the entry counts as a miss.
+
+A cache can also be bounded by total weight (e.g. bytes) via `max_weight`
+and a `weigher`: least-recently-used entries are evicted until the total
+fits, and a single entry heavier than `max_entry_weight` is never stored, so
+a few giant payloads cannot flush everything else out. The default weigher
+(json_size) serializes each value; prefer one that reads a size already
+known, such as upstream.body_size.
+
+Exceptions listed in `fallback_on` (e.g. an exhausted rate budget) make
+get_or_load serve an entry that has outlived even `max_stale`, as STALE,
+rather than fail; any other loader error still propagates, but the expired
+entry is kept so a later fallback can still use it.
+
+The cache is not thread-safe; use it from the event loop (async handlers).
+"""
+
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple, Union
+
+Loader = Callable[[], Awaitable[Any]]
+TTL = Union[float, Callable[[Any], float], None]
+
+
+def json_size(value: Any) -> int:
+    """Approximate in-memory cost of a JSON-like value as its compact serialized length"""
+    return len(json.dumps(value, separators=(",", ":"), default=str))
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries expire after a per-entry TTL"""
+
+    def __init__(self, maxsize: int = 256, ttl: float = 60.0, max_stale: float = 0.0,
+                 max_weight: Optional[int] = None, weigher: Callable[[Any], int] = json_size,
+                 max_entry_weight: Optional[int] = None, fallback_on: Tuple[type, ...] = ()):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.max_weight = max_weight
+        self.weigher = weigher
+        self.max_entry_weight = max_entry_weight if max_entry_weight is not None else (max_weight and max_weight // 8)
+        self.fallback_on = fallback_on
+        # key -> (stored_at, fresh_until, value, weight)
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._refreshing: Dict[Hashable, asyncio.Task] = {}
+        self.weight = 0
+        self.rejected = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _lookup(self, key: Hashable) -> Optional[tuple]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry[1] + self.max_stale <= time.monotonic():
+            self._remove(key)
+            return None
+        self._data.move_to_end(key)
+        return entry
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._lookup(key)
+        if entry is None or entry[1] <= time.monotonic():
+            self.misses += 1
+            return default
+        self.hits += 1
+        return entry[2]
+
+    def set(self, key: Hashable, value: Any, ttl: TTL = None):
+        if ttl is None:
+            ttl = self.ttl
+        elif callable(ttl):
+            ttl = ttl(value)
+        weight = 0
+        if self.max_weight is not None:
+            weight = self.weigher(value)
+            if self.max_entry_weight and weight > self.max_entry_weight:
+                self._remove(key)
+                self.rejected += 1
+                return
+        self._remove(key)
+        now = time.monotonic()
+        self._data[key] = (now, now + ttl, value, weight)
+        self.weight += weight
+        while len(self._data) > self.maxsize or (self.max_weight is not None and self.weight > self.max_weight):
+            _, evicted = self._data.popitem(last=False)
+            self.weight -= evicted[3]
+            self.evictions += 1
+
+    def _remove(self, key: Hashable) -> Optional[tuple]:
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self.weight -= entry[3]
+        return entry
+
+    async def get_or_load(self, key: Hashable, loader: Loader, ttl: TTL = None) -> Tuple[Any, float, str]:
+        """Return (value, age_seconds, state) where state is HIT, STALE or MISS.
+
+        `ttl` may be a number or a function of the loaded value.
+        """
+        expired = self._data.get(key)
+        entry = self._lookup(key)
+        now = time.monotonic()
+        if entry is not None:
+            stored_at, fresh_until, value, _ = entry
+            if fresh_until > now:
+                self.hits += 1
+                return value, now - stored_at, "HIT"
+            self.stale_hits += 1
+            self._refresh_in_background(key, loader, ttl)
+            return value, now - stored_at, "STALE"
+        self.misses += 1
+        try:
+            value = await loader()
+        except Exception as e:
+            if expired is None:
+                raise
+            if key not in self._data:
+                # Keep the last good copy for a later fallback
+                self._data[key] = expired
+                self.weight += expired[3]
+            if not isinstance(e, self.fallback_on):
+                raise
+            return expired[2], time.monotonic() - expired[0], "STALE"
+        self.set(key, value, ttl)
+        return value, 0.0, "MISS"
+
+    def _refresh_in_background(self, key: Hashable, loader: Loader, ttl: TTL):
+        if key in self._refreshing:
+            return
+
+        async def refresh():
+            try:
+                self.set(key, await loader(), ttl)
+            except Exception:
+                # Keep serving the stale copy until max_stale runs out
+                pass
+            finally:
+                self._refreshing.pop(key, None)
+
+        self._refreshing[key] = asyncio.get_running_loop().create_task(refresh())
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._remove(key)
+        return default if entry is None else entry[2]
+
+    def clear(self):
+        self._data.clear()
+        self.weight = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "weight": self.weight,
+            "max_weight": self.max_weight,
+            "rejected": self.rejected,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "refreshing": len(self._refreshing),
+            "hit_ratio": round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0,
+        }
@@ -5,7 +5,7 @@ MongoDB helper functions ready to use in your backend code.
 Import and use these functions in your API endpoints for database operations.
 """
 
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateOne
 from datetime import datetime, timezone
 import os
 from dotenv import load_dotenv
@@ -43,13 +43,55 @@ def create_document(collection_name: str, data: Union[BaseModel, dict]):
     result = db[collection_name].insert_one(data_dict)
     return str(result.inserted_id)
 
-def get_documents(collection_name: str, filter_dict: dict = None, limit: int = None):
-    """Get documents from collection"""
+def get_documents(collection_name: str, filter_dict: dict = None, limit: int = None, sort: list = None):
+    """Get documents from collection, optionally sorted by [(field, direction), ...]"""
     if db is None:
         raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
     
     cursor = db[collection_name].find(filter_dict or {})
+    if sort:
+        cursor = cursor.sort(sort)
     if limit:
         cursor = cursor.limit(limit)
     
     return list(cursor)
+
+def upsert_document(collection_name: str, filter_dict: dict, data: Union[BaseModel, dict]):
+    """Insert or update the document matching filter_dict, keeping its created_at"""
+    if db is None:
+        raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
+
+    if isinstance(data, BaseModel):
+        data_dict = data.model_dump()
+    else:
+        data_dict = data.copy()
+
+    data_dict['updated_at'] = datetime.now(timezone.utc)
+
+    db[collection_name].update_one(
+        filter_dict,
+        {"$set": data_dict, "$setOnInsert": {"created_at": datetime.now(timezone.utc)}},
+        upsert=True,
+    )
+
+def insert_missing_documents(collection_name: str, key_field: str, documents: list):
+    """Insert documents whose key_field value is not stored yet; existing ones are left untouched"""
+    if db is None:
+        raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
+    if not documents:
+        return 0
+
+    now = datetime.now(timezone.utc)
+    ops = [
+        UpdateOne({key_field: doc[key_field]}, {"$setOnInsert": {**doc, "created_at": now}}, upsert=True)
+        for doc in documents
+    ]
+    result = db[collection_name].bulk_write(ops, ordered=False)
+    return result.upserted_count
+
+def ensure_index(collection_name: str, keys: list, unique: bool = False):
+    """Create an index on [(field, direction), ...] if it does not exist"""
+    if db is None:
+        raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
+
+    return db[collection_name].create_index(keys, unique=unique)
@@ -1,12 +1,53 @@
+import asyncio
+import json
 import os
+import threading
 import time
-from typing import Optional, List, Dict, Any
+from contextlib import asynccontextmanager
+from typing import Optional, List, Dict, Any, Hashable, Tuple
 
-import requests
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Response, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+
+from balllog import BallLogs, is_wicket
+from breaker import Breakers, CircuitOpen
+from cache import TTLCache
+from poller import MatchPoller, MatchStore, MatchWatcher, PHASE_INTERVALS, match_phase
+from news import NEWS_MAX_PAGE_SIZE, NEWS_PAGE_SIZE, NewsAggregator
+from providers import (
+    ADAPTERS, NormalizeLive, ProviderAdapter, configured_providers, get_adapter, live_sportmonks,
+    normalize_cricbuzz, normalize_sportmonks, register,
+)
+from pubsub import CLOSED, Event, Hub
+from rankings import RankingsStore
+from ratelimit import BACKGROUND, LIVE, PRIORITY, BudgetExhausted, budget, budget_stats
+from router import FAILOVER, NoProviderAvailable, ProviderRouter
+from tweets import TWEETS_BUFFER, TweetCache
+from upstream import (
+    http_get, http_get_conditional, close_sessions, aclose_clients,
+    conditional_stats, hedge_stats, SingleFlight, AsyncSingleFlight, flight_key,
+    JSONBody, body_size, parse_json,
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if POLLER_ENABLED and is_external_configured():
+        MATCH_POLLER.start()
+    RANKINGS.start()
+    NEWS.start()
+    yield
+    await NEWS.stop()
+    await RANKINGS.stop()
+    await MATCH_WATCHER.stop()
+    await LIST_WATCHER.stop()
+    await MATCH_POLLER.stop()
+    await aclose_clients()
+    close_sessions()
+
 
-app = FastAPI(title="Cricket API Proxy", version="1.1")
+app = FastAPI(title="Cricket API Proxy", version="1.1", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -22,29 +63,105 @@ SPORTMONKS_BASE = os.getenv("SPORTMONKS_BASE", "https://cricket.sportmonks.com/a
 RAPIDAPI_HOST = os.getenv("RAPIDAPI_HOST")
 RAPIDAPI_KEY = os.getenv("RAPIDAPI_KEY")
 
+# Seconds a cached /api/matches list stays fresh, per match type
+MATCHES_TTL = {
+    "live": float(os.getenv("MATCHES_TTL_LIVE", "10")),
+    "upcoming": float(os.getenv("MATCHES_TTL_UPCOMING", "300")),
+    "completed": float(os.getenv("MATCHES_TTL_COMPLETED", "1800")),
+}
+# Seconds an expired entry may still be served while one background refresh runs
+MATCHES_MAX_STALE = float(os.getenv("MATCHES_MAX_STALE", "120"))
+MATCHES_CACHE = TTLCache(
+    maxsize=int(os.getenv("MATCHES_CACHE_SIZE", "64")), max_stale=MATCHES_MAX_STALE,
+    fallback_on=(BudgetExhausted, CircuitOpen, NoProviderAvailable),
+)
+
+# Match details are cached per (provider, match_id, include set). Finished
+# fixtures are effectively immutable; live ones refresh every few seconds.
+DETAIL_INCLUDES = (
+    "localteam", "visitorteam", "venue",
+    "runs", "batting", "bowling", "manofmatch", "manofseries",
+    "lineup", "balls", "scoreboards",
+)
+DETAILS_TTL = {
+    "live": float(os.getenv("DETAILS_TTL_LIVE", "5")),
+    "upcoming": float(os.getenv("DETAILS_TTL_UPCOMING", "60")),
+    "completed": float(os.getenv("DETAILS_TTL_FINISHED", "86400")),
+}
+DETAILS_MAX_STALE = float(os.getenv("DETAILS_MAX_STALE", "60"))
+DETAILS_CACHE = TTLCache(
+    maxsize=int(os.getenv("DETAILS_CACHE_SIZE", "1024")),
+    max_stale=DETAILS_MAX_STALE,
+    max_weight=int(os.getenv("DETAILS_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+    # Weighed by the upstream body length carried on the payload, not re-serialized
+    weigher=body_size,
+    fallback_on=(BudgetExhausted, CircuitOpen),
+)
+
+# Per-endpoint circuit breakers: after consecutive provider failures calls fail
+# fast (CircuitOpen) and are answered from cached or sample data.
+BREAKERS = Breakers(
+    failure_threshold=int(os.getenv("BREAKER_FAILURES", "5")),
+    reset_timeout=float(os.getenv("BREAKER_RESET", "30")),
+    ignore=(BudgetExhausted,),
+)
+# Client errors such as 404 for an unknown match_id are remembered briefly so
+# repeated bad lookups do not reach the provider. The sync helpers use it from
+# worker threads, so access goes through _negative_lock.
+NEGATIVE_STATUSES = (400, 404, 410, 422)
+NEGATIVE_CACHE = TTLCache(maxsize=int(os.getenv("NEGATIVE_CACHE_SIZE", "4096")), ttl=float(os.getenv("NEGATIVE_TTL", "60")))
+_negative_lock = threading.Lock()
+
+BALL_LOGS = BallLogs(max_matches=int(os.getenv("BALL_LOG_MATCHES", "64")))
+
+# Live updates for the SSE and WebSocket streams: topics "matches:<type>" and
+# "match:<provider>:<id>" (match ids are per provider). Clients whose queue fills up are dropped as slow consumers.
+HUB = Hub(queue_size=int(os.getenv("STREAM_QUEUE_SIZE", "64")))
+WS_MAX_MATCHES = int(os.getenv("WS_MAX_MATCHES", "50"))
+SSE_HEARTBEAT = float(os.getenv("SSE_HEARTBEAT", "15"))
+STREAM_INCLUDES = ("runs", "scoreboards", "balls")
+# Upper bound on the per-match refresh interval while a stream is open
+STREAM_MAX_INTERVAL = float(os.getenv("STREAM_MAX_INTERVAL", "60"))
+# Ball logs and last published scores are keyed by (provider, match_id)
+LAST_SCORES = TTLCache(maxsize=1024, ttl=3600)
+
+# Background poller that keeps match lists warm so /api/matches is a pure read
+POLLER_ENABLED = os.getenv("POLLER_ENABLED", "1").lower() not in ("0", "false", "no")
+MATCH_STORE = MatchStore()
+
+# ICC rankings are refreshed in the background and served from memory
+RANKINGS = RankingsStore()
+
 NEWS_SOURCES = [
     "https://www.espncricinfo.com/rss/content/story/feeds/0.xml",
     "https://www.icc-cricket.com/rss/news",
 ]
+NEWS = NewsAggregator(NEWS_SOURCES)
+
+# Per-query tweet buffers, refreshed incrementally with since_id
+TWEETS = TweetCache(os.getenv("X_BEARER_TOKEN"))
 
 
 def is_external_configured() -> bool:
-    return bool(CRICKET_API_KEY or (RAPIDAPI_KEY and RAPIDAPI_HOST))
+    # Any registered adapter with credentials; sample data otherwise
+    return bool(configured_providers())
 
 
-def sportmonks_get(path: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+def set_cache_headers(response: Response, age: float, state: str):
+    response.headers["Age"] = str(int(age))
+    response.headers["X-Cache"] = state
+
+
+def _sportmonks_request(path: str, params: Optional[Dict[str, Any]]) -> Tuple[str, Dict[str, Any]]:
     if not CRICKET_API_KEY:
         raise HTTPException(status_code=501, detail="CRICKET_API_KEY not set for SportMonks")
     url = f"{SPORTMONKS_BASE.rstrip('/')}/{path.lstrip('/')}"
-    params = params or {}
+    params = dict(params or {})
     params["api_token"] = CRICKET_API_KEY
-    r = requests.get(url, params=params, timeout=15)
-    if r.status_code != 200:
-        raise HTTPException(status_code=r.status_code, detail=r.text)
-    return r.json()
+    return url, params
 
 
-def rapidapi_get(path: str, params: Optional[Dict[str, Any]] = None, base: str = "https://cricbuzz-cricket.p.rapidapi.com") -> Dict[str, Any]:
+def _rapidapi_request(path: str, base: str) -> Tuple[str, Dict[str, str]]:
     if not RAPIDAPI_KEY or not RAPIDAPI_HOST:
         raise HTTPException(status_code=501, detail="RAPIDAPI_KEY or RAPIDAPI_HOST not configured")
     url = f"{base.rstrip('/')}/{path.lstrip('/')}"
@@ -52,12 +169,122 @@ def rapidapi_get(path: str, params: Optional[Dict[str, Any]] = None, base: str =
         "X-RapidAPI-Key": RAPIDAPI_KEY,
         "X-RapidAPI-Host": RAPIDAPI_HOST,
     }
-    r = requests.get(url, headers=headers, params=params or {}, timeout=15)
+    return url, headers
+
+
+def _json_or_raise(r) -> Dict[str, Any]:
     if r.status_code != 200:
         raise HTTPException(status_code=r.status_code, detail=r.text)
     return r.json()
 
 
+# Concurrent identical upstream calls (same path and params) share one fetch
+_flights = SingleFlight()
+_async_flights = AsyncSingleFlight()
+
+
+def _conditional_json_or_raise(result) -> Dict[str, Any]:
+    r, data = result
+    if data is None:
+        raise HTTPException(status_code=r.status_code, detail=r.text)
+    return data
+
+
+# Every provider call spends a token from that provider's budget (ratelimit.py)
+# and reports the response back so the budget tracks the provider's own count.
+# Calls go through the endpoint's circuit breaker; client errors are negatively cached.
+def _raise_if_negative(key: Hashable):
+    with _negative_lock:
+        cached = NEGATIVE_CACHE.get(key)
+    if cached is not None:
+        raise HTTPException(status_code=cached[0], detail=cached[1])
+
+
+def _remember_negative(key: Hashable, e: HTTPException):
+    if e.status_code in NEGATIVE_STATUSES:
+        with _negative_lock:
+            NEGATIVE_CACHE.set(key, (e.status_code, e.detail))
+
+
+def _hedge_budget(provider: str):
+    # A hedge (upstream.py) is a second provider call; it only uses spare tokens
+    return lambda: budget(provider).try_acquire(BACKGROUND)
+
+
+def sportmonks_get(path: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    key = flight_key("sportmonks", path, params=params)
+    _raise_if_negative(key)
+    url, params = _sportmonks_request(path, params)
+
+    def fetch() -> Dict[str, Any]:
+        budget("sportmonks").acquire_nowait()
+        r = http_get(url, params=params, timeout=15)
+        data = r.json() if r.status_code == 200 else None
+        budget("sportmonks").observe(r.status_code, r.headers, data)
+        return _conditional_json_or_raise((r, data))
+
+    try:
+        return _flights.do(key, lambda: BREAKERS.get("sportmonks", path).call_sync(fetch))
+    except HTTPException as e:
+        _remember_negative(key, e)
+        raise
+
+
+async def sportmonks_get_async(path: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    key = flight_key("sportmonks", path, params=params)
+    _raise_if_negative(key)
+    url, params = _sportmonks_request(path, params)
+
+    async def fetch() -> Dict[str, Any]:
+        await budget("sportmonks").acquire()
+        r, data = await http_get_conditional(url, parse_json, params=params, timeout=15, hedge=_hedge_budget("sportmonks"))
+        # On a 304 `data` is the earlier parsed body, so its rate_limit block is stale
+        budget("sportmonks").observe(r.status_code, r.headers, data if r.status_code == 200 else None)
+        return _conditional_json_or_raise((r, data))
+
+    try:
+        return await _async_flights.do(key, lambda: BREAKERS.get("sportmonks", path).call(fetch))
+    except HTTPException as e:
+        _remember_negative(key, e)
+        raise
+
+
+def rapidapi_get(path: str, params: Optional[Dict[str, Any]] = None, base: str = "https://cricbuzz-cricket.p.rapidapi.com") -> Dict[str, Any]:
+    key = flight_key("rapidapi", base, path, params=params)
+    _raise_if_negative(key)
+    url, headers = _rapidapi_request(path, base)
+
+    def fetch() -> Dict[str, Any]:
+        budget("rapidapi").acquire_nowait()
+        r = http_get(url, headers=headers, params=params or {}, timeout=15)
+        budget("rapidapi").observe(r.status_code, r.headers)
+        return _json_or_raise(r)
+
+    try:
+        return _flights.do(key, lambda: BREAKERS.get("rapidapi", path).call_sync(fetch))
+    except HTTPException as e:
+        _remember_negative(key, e)
+        raise
+
+
+async def rapidapi_get_async(path: str, params: Optional[Dict[str, Any]] = None, base: str = "https://cricbuzz-cricket.p.rapidapi.com") -> Dict[str, Any]:
+    key = flight_key("rapidapi", base, path, params=params)
+    _raise_if_negative(key)
+    url, headers = _rapidapi_request(path, base)
+
+    async def fetch() -> Dict[str, Any]:
+        await budget("rapidapi").acquire()
+        r, data = await http_get_conditional(url, parse_json, headers=headers, params=params or {}, timeout=15, hedge=_hedge_budget("rapidapi"))
+        budget("rapidapi").observe(r.status_code, r.headers)
+        return _conditional_json_or_raise((r, data))
+
+    try:
+        return await _async_flights.do(key, lambda: BREAKERS.get("rapidapi", path).call(fetch))
+    except HTTPException as e:
+        _remember_negative(key, e)
+        raise
+
+
 # -----------------
 # Sample Fallback Data (used when API keys are not configured)
 # -----------------
@@ -162,148 +389,531 @@ def test_database():
     return response
 
 
+# Provider adapters: raw fetchers here, batch normalizers in providers.py.
+SPORTMONKS_LISTS = {"live": "livescores", "upcoming": "fixtures", "completed": "fixtures/finished"}
+# runs carry the overs the poller needs to detect the final-overs phase
+SPORTMONKS_LIST_PARAMS = {"include": "localteam,visitorteam,venue,season,runs"}
+CRICBUZZ_LISTS = {"live": "matches/v1/live", "upcoming": "matches/v1/upcoming", "completed": "matches/v1/recent"}
+
+
+async def sportmonks_list(type: str) -> List[Dict[str, Any]]:
+    data = await sportmonks_get_async(SPORTMONKS_LISTS[type], SPORTMONKS_LIST_PARAMS)
+    return data.get("data", [])
+
+
+async def sportmonks_details(match_id: str, includes: Tuple[str, ...]) -> Dict[str, Any]:
+    params = {"include": ",".join(includes)}
+    return project_details(await sportmonks_get_async(f"fixtures/{match_id}", params), includes)
+
+
+async def cricbuzz_list(type: str) -> List[Dict[str, Any]]:
+    data = await rapidapi_get_async(CRICBUZZ_LISTS[type])
+    return data.get("matches", data)  # depends on API
+
+
+async def cricbuzz_details(match_id: str, includes: Tuple[str, ...]) -> Dict[str, Any]:
+    # Cricbuzz mcenter has no include list and no deliveries; the payload is returned as-is
+    return await rapidapi_get_async(f"mcenter/v1/{match_id}")
+
+
+register(ProviderAdapter(
+    "sportmonks", sportmonks_list, normalize_sportmonks, sportmonks_details,
+    configured=lambda: bool(CRICKET_API_KEY), supports_includes=True, normalize_live=live_sportmonks,
+))
+register(ProviderAdapter(
+    "cricbuzz", cricbuzz_list, normalize_cricbuzz, cricbuzz_details,
+    configured=lambda: bool(RAPIDAPI_KEY and RAPIDAPI_HOST), aliases=("rapidapi",),
+))
+
+# CRICKET_API_PROVIDER names the primary adapter or an alias; unknown values
+# fall back to the first registered one
+PRIMARY_PROVIDER = (get_adapter(API_PROVIDER) or next(iter(ADAPTERS.values()))).name
+
+
+def resolve_provider(provider: Optional[str]) -> str:
+    """Registered name for a requested provider (default: the primary one); 400 if unknown"""
+    if provider is None:
+        return PRIMARY_PROVIDER
+    adapter = get_adapter(provider)
+    if adapter is None:
+        raise HTTPException(status_code=400, detail=f"Unknown provider {provider!r}; expected one of: {', '.join(ADAPTERS)}")
+    return adapter.name
+
+
+# failover: next provider when one errors or exceeds PROVIDER_ATTEMPT_TIMEOUT;
+# race: ask all configured providers and take the first valid list
+PROVIDER_ROUTER = ProviderRouter(
+    {name: adapter.cards for name, adapter in ADAPTERS.items()},
+    configured_providers(PRIMARY_PROVIDER),
+    mode=os.getenv("PROVIDER_MODE", FAILOVER).lower(),
+    attempt_timeout=float(os.getenv("PROVIDER_ATTEMPT_TIMEOUT", "5")),
+    valid=lambda cards: isinstance(cards, list),
+    # In race mode an empty list only wins if no provider has matches
+    empty=lambda cards: not cards,
+)
+
+
+async def fetch_match_cards(type: str) -> List[Dict[str, Any]]:
+    """Fetch a live/upcoming/completed list as cards from the first provider that answers."""
+    _, cards = await PROVIDER_ROUTER.fetch(type)
+    return cards
+
+
+def publish_match_updates(type: str, cards: List[Dict[str, Any]], previous: Optional[List[Dict[str, Any]]]):
+    """Poller hook: push changed lists and cards to stream subscribers."""
+    if previous is not None and cards == previous:
+        return
+    HUB.publish(f"matches:{type}", "matches", {"type": type, "matches": cards})
+    before = {c.get("id"): c for c in previous or []}
+    for card in cards:
+        if before.get(card.get("id")) != card:
+            HUB.publish(match_topic(card.get("provider") or PRIMARY_PROVIDER, str(card.get("id"))), "card", card)
+
+
+async def poll_match_cards(type: str) -> List[Dict[str, Any]]:
+    """Poller fetch: live lists spend the live budget, the others only spare tokens."""
+    PRIORITY.set(LIVE if type == "live" else BACKGROUND)
+    return await fetch_match_cards(type)
+
+
+MATCH_POLLER = MatchPoller(
+    poll_match_cards,
+    MATCH_STORE,
+    intervals={
+        phase: float(os.getenv(f"POLL_{phase.upper()}_INTERVAL", default))
+        for phase, default in PHASE_INTERVALS.items()
+    },
+    idle_interval=float(os.getenv("POLL_IDLE_INTERVAL", "60")),
+    grace=MATCHES_MAX_STALE,
+    on_update=publish_match_updates,
+)
+
+
+def sample_matches(type: str) -> List[Dict[str, Any]]:
+    if type == "live":
+        return [m for m in SAMPLE_MATCHES if m["status"] == "LIVE"]
+    if type == "upcoming":
+        return [m for m in SAMPLE_MATCHES if m["status"] == "UPCOMING"]
+    return []
+
+
+async def current_matches(type: str) -> Tuple[Dict[str, Any], float, str]:
+    """Return ({type, matches}, age_seconds, cache_state) for a match list."""
+    if not is_external_configured():
+        return {"type": type, "matches": sample_matches(type)}, 0.0, "SAMPLE"
+
+    polled = MATCH_POLLER.read(type)
+    if polled is not None:
+        cards, age = polled
+        return {"type": type, "matches": cards}, age, "POLLED"
+
+    async def load() -> Dict[str, Any]:
+        return {"type": type, "matches": await fetch_match_cards(type)}
+
+    try:
+        return await MATCHES_CACHE.get_or_load(("cards", type), load, ttl=MATCHES_TTL[type])
+    except (BudgetExhausted, CircuitOpen, NoProviderAvailable):
+        # Out of budget or providers down: last-known-good list, else sample data
+        stored = MATCH_STORE.get(type)
+        if stored is None:
+            return {"type": type, "matches": sample_matches(type)}, 0.0, "SAMPLE"
+        return {"type": type, "matches": stored[0]}, stored[1], "STALE"
+
+
 @app.get("/api/matches")
-def get_matches(type: str = Query("live", pattern="^(live|upcoming|completed)$")):
+async def get_matches(response: Response, type: str = Query("live", pattern="^(live|upcoming|completed)$")):
     """Return simplified match lists for live/upcoming/completed.
     Falls back to sample data when external provider isn't configured.
+    Served from the background poller's store; until the first poll lands (or if
+    the poller stalls) the list is cached per type for MATCHES_TTL[type] seconds,
+    then served stale for up to MATCHES_MAX_STALE seconds. Either configured
+    provider may fill the entry (PROVIDER_ROUTER); each card names its `provider`.
     """
     try:
-        if not is_external_configured():
-            # Filter sample based on requested type
-            if type == "live":
-                matches = [m for m in SAMPLE_MATCHES if m["status"] == "LIVE"]
-            elif type == "upcoming":
-                matches = [m for m in SAMPLE_MATCHES if m["status"] == "UPCOMING"]
-            else:
-                matches = []
-            return {"type": type, "matches": matches}
-
-        if API_PROVIDER == "sportmonks":
-            endpoint = {
-                "live": "livescores",
-                "upcoming": "fixtures",
-                "completed": "fixtures/finished",
-            }[type]
-            params = {"include": "localteam,visitorteam,venue,season"}
-            data = sportmonks_get(endpoint, params)
-            raw_matches = data.get("data", [])
-
-            def to_card(m: Dict[str, Any]) -> Dict[str, Any]:
-                lt = (m.get("localteam") or {})
-                vt = (m.get("visitorteam") or {})
-                venue = (m.get("venue") or {})
-                return {
-                    "id": m.get("id"),
-                    "status": m.get("status").upper() if m.get("status") else type.upper(),
-                    "note": m.get("note"),
-                    "runs": m.get("runs"),
-                    "league_id": m.get("season_id"),
-                    "localteam": {"id": lt.get("id"), "name": lt.get("name"), "code": lt.get("code")},
-                    "visitorteam": {"id": vt.get("id"), "name": vt.get("name"), "code": vt.get("code")},
-                    "venue": {"name": venue.get("name"), "city": venue.get("city")},
-                    "starting_at": m.get("starting_at"),
-                }
-
-            matches = [to_card(m) for m in raw_matches]
-            return {"type": type, "matches": matches}
-        else:
-            path = {
-                "live": "matches/v1/live",
-                "upcoming": "matches/v1/upcoming",
-                "completed": "matches/v1/recent",
-            }[type]
-            data = rapidapi_get(path)
-            items = data.get("matches", data)  # depends on API
-            cards = []
-            for m in items:
-                cards.append({
-                    "id": m.get("matchId") or m.get("id"),
-                    "status": (m.get("matchState") or m.get("status", type)).upper(),
-                    "note": m.get("seriesName"),
-                    "localteam": {"name": (m.get("team1") or {}).get("teamName"), "code": (m.get("team1") or {}).get("teamSName")},
-                    "visitorteam": {"name": (m.get("team2") or {}).get("teamName"), "code": (m.get("team2") or {}).get("teamSName")},
-                    "venue": {"name": m.get("venueInfo", {}).get("ground"), "city": m.get("venueInfo", {}).get("city")},
-                    "starting_at": m.get("startTime"),
-                })
-            return {"type": type, "matches": cards}
+        result, age, state = await current_matches(type)
+        set_cache_headers(response, age, state)
+        return result
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)[:200])
 
 
+@app.get("/api/cache/stats")
+async def cache_stats():
+    """Hit/miss counters for the in-process response caches.
+    Async so it runs on the event loop: the stats walk structures (latency
+    samples, hub topics, breakers) that the loop mutates and are not thread-safe."""
+    return {
+        "matches": MATCHES_CACHE.stats(),
+        "details": DETAILS_CACHE.stats(),
+        "streams": HUB.stats(),
+        "conditional": conditional_stats(),
+        "news_search": NEWS.search_index.stats(),
+        "tweets": TWEETS.stats(),
+        "providers": PROVIDER_ROUTER.stats(),
+        "rate_budgets": budget_stats(),
+        "breakers": BREAKERS.stats(),
+        "hedging": hedge_stats(),
+        "negative": NEGATIVE_CACHE.stats(),
+    }
+
+
+def details_ttl(details: Dict[str, Any]) -> float:
+    """Cache TTL for a match details payload, based on the match's phase."""
+    if "matchHeader" in details:  # Cricbuzz mcenter
+        header = details.get("matchHeader") or {}
+        card = {"status": header.get("state"), "starting_at": header.get("matchStartTimestamp")}
+    else:
+        card = details.get("data") or {}
+    phase = match_phase(card)
+    if phase == "completed":
+        return DETAILS_TTL["completed"]
+    if phase in ("live", "final_overs"):
+        return DETAILS_TTL["live"]
+    return DETAILS_TTL["upcoming"]
+
+
+def parse_includes(include: Optional[str]) -> Tuple[str, ...]:
+    """Validate a comma-separated include/fields list against DETAIL_INCLUDES."""
+    if not include:
+        return DETAIL_INCLUDES
+    requested = {part.strip() for part in include.split(",") if part.strip()}
+    unknown = requested - set(DETAIL_INCLUDES)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown include(s): {', '.join(sorted(unknown))}")
+    return tuple(i for i in DETAIL_INCLUDES if i in requested)
+
+
+def project_details(details: Dict[str, Any], includes: Tuple[str, ...]) -> Dict[str, Any]:
+    """Drop include sections that were not requested; base fixture fields are always kept."""
+    data = details.get("data")
+    if len(includes) == len(DETAIL_INCLUDES) or not isinstance(data, dict):
+        return details
+    drop = set(DETAIL_INCLUDES).difference(includes)
+    projected = JSONBody(details, data={k: v for k, v in data.items() if k not in drop})
+    projected.size = body_size(details)
+    return projected
+
+
+async def load_match_details(match_id: str, includes: Tuple[str, ...],
+                             provider: Optional[str] = None) -> Tuple[Dict[str, Any], float, str]:
+    """Return (details, age_seconds, cache_state) for a match, narrowed to `includes`.
+    Match ids belong to the provider that issued them (a card's `provider`), so
+    details never fail over to another provider."""
+    if not is_external_configured():
+        if str(match_id) == str(SAMPLE_DETAILS.get("data", {}).get("id")):
+            return project_details(SAMPLE_DETAILS, includes), 0.0, "SAMPLE"
+        # For unknown IDs in sample mode, try mapping from SAMPLE_MATCHES
+        for m in SAMPLE_MATCHES:
+            if str(m["id"]) == str(match_id):
+                return project_details(SAMPLE_DETAILS, includes), 0.0, "SAMPLE"  # Return the same shape for simplicity
+        raise HTTPException(status_code=404, detail="Sample match not found")
+
+    adapter = get_adapter(resolve_provider(provider))
+    if not adapter.configured():
+        raise HTTPException(status_code=400, detail=f"Provider {adapter.name} is not configured")
+
+    async def load() -> Dict[str, Any]:
+        return await adapter.fetch_details(match_id, includes)
+
+    key = (adapter.name, str(match_id), frozenset(includes if adapter.supports_includes else DETAIL_INCLUDES))
+
+    return await DETAILS_CACHE.get_or_load(key, load, ttl=details_ttl)
+
+
 @app.get("/api/match/{match_id}")
-def get_match_details(match_id: str):
+async def get_match_details(
+    match_id: str,
+    response: Response,
+    include: Optional[str] = Query(None, description="Comma-separated sections to return, e.g. runs,scoreboards"),
+    fields: Optional[str] = Query(None, description="Alias for include"),
+    provider: Optional[str] = Query(None, description="Provider that issued the id (a card's `provider`)"),
+):
     """Match details: commentary, balls, scoreboard, playing XI, simplified response.
     Falls back to sample data when external provider isn't configured.
+    `include`/`fields` narrows both the SportMonks include list and the response body.
+    Cached per include set with TTLs tiered by match state (DETAILS_TTL), then
+    served stale for up to DETAILS_MAX_STALE seconds while refreshing.
     """
     try:
-        if not is_external_configured():
-            if str(match_id) == str(SAMPLE_DETAILS.get("data", {}).get("id")):
-                return SAMPLE_DETAILS
-            # For unknown IDs in sample mode, try mapping from SAMPLE_MATCHES
-            for m in SAMPLE_MATCHES:
-                if str(m["id"]) == str(match_id):
-                    return SAMPLE_DETAILS  # Return the same shape for simplicity
-            raise HTTPException(status_code=404, detail="Sample match not found")
-
-        if API_PROVIDER == "sportmonks":
-            params = {"include": ",".join([
-                "localteam,visitorteam,venue",
-                "runs,batting,bowling,manofmatch,manofseries",
-                "lineup,balls,scoreboards",
-            ])}
-            data = sportmonks_get(f"fixtures/{match_id}", params)
-            return data
-        else:
-            details = rapidapi_get(f"mcenter/v1/{match_id}")
-            return details
+        includes = parse_includes(include or fields)
+        data, age, state = await load_match_details(match_id, includes, resolve_provider(provider))
+        set_cache_headers(response, age, state)
+        return data
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)[:200])
 
 
+@app.get("/api/match/{match_id}/balls")
+async def get_match_balls(
+    match_id: str,
+    response: Response,
+    after: int = Query(0, ge=0, description="Sequence number of the last delivery the client has"),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    provider: Optional[str] = Query(None, description="Provider that issued the id (a card's `provider`)"),
+):
+    """Deliveries logged after the `after` cursor, oldest first, plus the new cursor.
+    If the cursor is ahead of the server's log (e.g. after a restart) the log is
+    returned from the start with `reset: true`.
+    """
+    try:
+        provider = resolve_provider(provider)
+        normalize_live = live_normalizer(provider)
+        data, age, state = await load_match_details(match_id, ("balls",), provider)
+        set_cache_headers(response, age, state)
+        log = BALL_LOGS.get((provider, str(match_id)))
+        log.ingest(normalize_live(data)[1])
+        reset = after > log.cursor
+        balls = log.since(0 if reset else after, limit)
+        return {
+            "match_id": match_id,
+            "provider": provider,
+            "balls": balls,
+            "cursor": balls[-1]["seq"] if balls else min(after, log.cursor),
+            "latest": log.cursor,
+            "reset": reset,
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e)[:200])
+
+
+def live_normalizer(provider: str) -> NormalizeLive:
+    """The provider's (score, balls) normalizer; 501 if its details have no deliveries."""
+    if not is_external_configured():
+        # Sample details have the SportMonks shape
+        return live_sportmonks
+    normalize_live = get_adapter(provider).normalize_live
+    if normalize_live is None:
+        raise HTTPException(status_code=501, detail=f"Ball-by-ball data is not available from {provider}")
+    return normalize_live
+
+
+def match_topic(provider: str, match_id: str) -> str:
+    return f"match:{provider}:{match_id}"
+
+
+async def refresh_match_stream(key: Tuple[str, str]) -> float:
+    """MatchWatcher hook: publish score changes and new deliveries for one (provider, match_id)."""
+    PRIORITY.set(LIVE)
+    provider, match_id = key
+    normalize_live = live_normalizer(provider)
+    details, _, _ = await load_match_details(match_id, STREAM_INCLUDES, provider)
+    topic = match_topic(provider, match_id)
+    score, balls = normalize_live(details)
+    if LAST_SCORES.get(key) != score:
+        LAST_SCORES.set(key, score)
+        HUB.publish(topic, "score", score)
+    log = BALL_LOGS.get(key)
+    backfill = log.cursor == 0
+    added = log.ingest(balls)
+    if not backfill:
+        # The initial history is left to /api/match/{id}/balls
+        for ball in added:
+            HUB.publish(topic, "ball", ball)
+            if is_wicket(ball):
+                HUB.publish(topic, "wicket", ball)
+    return min(details_ttl(details), STREAM_MAX_INTERVAL)
+
+
+MATCH_WATCHER = MatchWatcher(refresh_match_stream)
+
+
+async def refresh_match_list(type: str) -> float:
+    """LIST_WATCHER hook (poller disabled): publish list changes to open streams."""
+    PRIORITY.set(LIVE if type == "live" else BACKGROUND)
+    result, _, _ = await current_matches(type)
+    publish_match_updates(type, result["matches"], LAST_LISTS.get(type))
+    LAST_LISTS[type] = result["matches"]
+    return MATCHES_TTL[type]
+
+
+# Refreshes match lists by type while /api/stream/matches clients are open and
+# the poller is off; LAST_LISTS holds what those clients were last sent.
+LIST_WATCHER = MatchWatcher(refresh_match_list)
+LAST_LISTS: Dict[str, List[Dict[str, Any]]] = {}
+
+
+async def match_snapshot(provider: str, match_id: str) -> Event:
+    """Current score for a newly subscribed client; seeds the diff state so the
+    watcher only publishes what changes after it."""
+    normalize_live = live_normalizer(provider)
+    details, _, _ = await load_match_details(match_id, STREAM_INCLUDES, provider)
+    score, balls = normalize_live(details)
+    LAST_SCORES.set((provider, match_id), score)
+    BALL_LOGS.get((provider, match_id)).ingest(balls)
+    return Event(match_topic(provider, match_id), "score", score)
+
+
+def sse_message(message: Event) -> str:
+    return f"event: {message.event}\ndata: {message.data_json}\n\n"
+
+
+async def sse_events(topic: str, initial: List[Event], watch: Optional[Tuple[MatchWatcher, Hashable]] = None):
+    # Subscribe inside the generator so cleanup always pairs with setup,
+    # even when the client disconnects before streaming starts
+    sub = HUB.subscribe(topic)
+    if watch is not None:
+        watch[0].watch(watch[1])
+    try:
+        for message in initial:
+            yield sse_message(message)
+        while True:
+            message = await sub.get(timeout=SSE_HEARTBEAT)
+            if message is None:
+                yield ": keep-alive\n\n"
+                continue
+            if message is CLOSED:
+                return
+            yield sse_message(message)
+    finally:
+        sub.close()
+        if watch is not None:
+            watch[0].unwatch(watch[1])
+
+
+def sse_response(events) -> StreamingResponse:
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(events, media_type="text/event-stream", headers=headers)
+
+
+@app.get("/api/stream/matches")
+async def stream_matches(type: str = Query("live", pattern="^(live|upcoming|completed)$")):
+    """Server-Sent Events: the current list as a `matches` event, then a new
+    `matches` event whenever the list changes. Changes come from the background
+    poller, or with POLLER_ENABLED=0 from LIST_WATCHER while the stream is open.
+    Sample data (no provider configured) never changes, so only keep-alives follow."""
+    result, _, _ = await current_matches(type)
+    watch = None
+    if is_external_configured() and not POLLER_ENABLED:
+        LAST_LISTS[type] = result["matches"]
+        watch = (LIST_WATCHER, type)
+    return sse_response(sse_events(f"matches:{type}", [Event(f"matches:{type}", "matches", result)], watch=watch))
+
+
+@app.get("/api/stream/match/{match_id}")
+async def stream_match(match_id: str, provider: Optional[str] = Query(None, description="Provider that issued the id (a card's `provider`)")):
+    """Server-Sent Events for one match: a `score` snapshot on connect, then
+    `card` (list card changed), `score` (runs/scoreboards changed), `ball`
+    (new delivery, with its seq cursor) and `wicket` events while the match is watched."""
+    match_id = str(match_id)
+    provider = resolve_provider(provider)
+    try:
+        snapshot = await match_snapshot(provider, match_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e)[:200])
+    watch = (MATCH_WATCHER, (provider, match_id)) if is_external_configured() else None
+    return sse_response(sse_events(match_topic(provider, match_id), [snapshot], watch=watch))
+
+
+@app.websocket("/ws/matches")
+async def ws_matches(websocket: WebSocket):
+    """WebSocket subscriptions to several matches at once.
+
+    Client messages: {"action": "subscribe" | "unsubscribe", "match_ids": [...],
+    "provider": optional, defaults to the primary provider}.
+    Server messages: {"topic", "event", "data"} with events `subscribed`
+    (data: {"matches": [{"provider", "match_id"}]}), `score`, `card`, `ball`,
+    `wicket` and `error`. A client that cannot keep up
+    with its send queue is closed with code 1013 and should reconnect.
+    """
+    await websocket.accept()
+    sub = HUB.subscribe()
+    watched: set = set()
+    watch = is_external_configured()
+
+    async def send_loop():
+        while True:
+            message = await sub.get()
+            if message is CLOSED:
+                await websocket.close(code=1013)
+                return
+            await websocket.send_text(message.json)
+
+    async def receive_loop():
+        while True:
+            try:
+                request = json.loads(await websocket.receive_text())
+                action = request.get("action")
+                provider = resolve_provider(request.get("provider"))
+                keys = [(provider, str(m)) for m in request.get("match_ids") or []]
+            except (ValueError, AttributeError, TypeError):
+                sub.offer(Event("", "error", {"detail": "Expected {\"action\": ..., \"match_ids\": [...]}"}))
+                continue
+            except HTTPException as e:
+                sub.offer(Event("", "error", {"status": e.status_code, "detail": e.detail}))
+                continue
+            if action == "subscribe":
+                added = [k for k in dict.fromkeys(keys) if k not in watched][:max(0, WS_MAX_MATCHES - len(watched))]
+                for key in added:
+                    topic = match_topic(*key)
+                    try:
+                        snapshot = await match_snapshot(*key)
+                    except HTTPException as e:
+                        sub.offer(Event(topic, "error", {"status": e.status_code, "detail": str(e.detail)[:200]}))
+                        continue
+                    except Exception as e:
+                        sub.offer(Event(topic, "error", {"status": 500, "detail": str(e)[:200]}))
+                        continue
+                    watched.add(key)
+                    sub.subscribe(topic)
+                    if watch:
+                        MATCH_WATCHER.watch(key)
+                    sub.offer(snapshot)
+            elif action == "unsubscribe":
+                for key in keys:
+                    if key in watched:
+                        watched.discard(key)
+                        sub.unsubscribe(match_topic(*key))
+                        if watch:
+                            MATCH_WATCHER.unwatch(key)
+            else:
+                sub.offer(Event("", "error", {"detail": f"Unknown action: {action}"}))
+                continue
+            matches = [{"provider": p, "match_id": m} for p, m in sorted(watched)]
+            sub.offer(Event("", "subscribed", {"matches": matches}))
+
+    tasks = [asyncio.create_task(send_loop()), asyncio.create_task(receive_loop())]
+    try:
+        # Either side ending (disconnect, slow-consumer drop) ends the connection
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        sub.close()
+        if watch:
+            for key in watched:
+                MATCH_WATCHER.unwatch(key)
+
+
 @app.get("/api/rankings")
-def get_rankings(format: str = Query("odi", pattern="^(test|odi|t20)$")):
-    """ICC rankings via public ICC site JSON if available, else fallback sample."""
+async def get_rankings(format: str = Query("odi", pattern="^(test|odi|t20)$")):
+    """ICC rankings via public ICC site JSON, served from the in-memory snapshot
+    that RANKINGS refreshes daily (fetched on demand until the first refresh lands)."""
     try:
-        url = f"https://www.icc-cricket.com/iccrankings/api/{format}/men/teams"
-        r = requests.get(url, timeout=15)
-        if r.status_code == 200:
-            teams = r.json()
-        else:
-            teams = []
-        players = {"batting": [], "bowling": [], "allrounder": []}
-        for cat in players.keys():
-            pr = requests.get(f"https://www.icc-cricket.com/iccrankings/api/{format}/men/{cat}", timeout=15)
-            if pr.status_code == 200:
-                players[cat] = pr.json()
-        return {"format": format, "teams": teams, "players": players}
+        return await RANKINGS.get(format)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)[:200])
 
 
 @app.get("/api/news")
-def get_news():
-    """Fetch latest cricket news via RSS and return normalized items."""
-    import feedparser  # type: ignore
-    items: List[Dict[str, Any]] = []
-    for src in NEWS_SOURCES:
-        try:
-            feed = feedparser.parse(src)
-            for e in feed.entries[:20]:
-                items.append({
-                    "title": e.get("title"),
-                    "link": e.get("link"),
-                    "summary": e.get("summary", ""),
-                    "published": e.get("published", e.get("updated")),
-                    "source": feed.feed.get("title", "RSS"),
-                    "image": (e.get("media_thumbnail") or e.get("media_content") or [{}])[0].get("url"),
-                })
-        except Exception:
-            continue
-    return {"items": items[:50]}
+async def get_news(cursor: Optional[str] = None, limit: int = Query(NEWS_PAGE_SIZE, ge=1, le=NEWS_MAX_PAGE_SIZE)):
+    """Cricket news from all RSS sources, newest first. The first page is served from memory;
+    pass `next_cursor` back as `cursor` to page through the archive."""
+    return await NEWS.page(cursor, limit)
+
+
+@app.get("/api/news/search")
+async def search_news(q: str = Query(..., min_length=1, max_length=200), limit: int = Query(10, ge=1, le=50)):
+    """Full-text search over news titles and summaries, ranked by BM25."""
+    return {"query": q, "items": await NEWS.search(q, limit)}
 
 
 @app.get("/api/trending-players")
@@ -320,30 +930,18 @@ def trending_players():
 
 
 @app.get("/api/tweets")
-def get_tweets(query: str = Query(..., description="Twitter handle or search query")):
+async def get_tweets(response: Response, query: str = Query(..., description="Twitter handle or search query"),
+                     limit: int = Query(10, ge=1, le=TWEETS_BUFFER)):
     """Fetch tweets via X API v2 if configured. Otherwise, return helpful sample tweets.
-    Configure with X_BEARER_TOKEN environment variable.
+    Configure with X_BEARER_TOKEN environment variable. Results are cached per query
+    and refreshed with since_id, so viewers of the same query share upstream calls.
     """
-    token = os.getenv("X_BEARER_TOKEN")
-    if not token:
+    if not TWEETS.token:
         # Return curated sample so UI is not empty during development
         return {"tweets": SAMPLE_TWEETS, "note": "Using sample tweets (set X_BEARER_TOKEN to fetch real tweets)"}
-    headers = {"Authorization": f"Bearer {token}"}
-    params = {"query": query, "tweet.fields": "created_at,public_metrics", "max_results": 10}
-    r = requests.get("https://api.twitter.com/2/tweets/search/recent", headers=headers, params=params, timeout=15)
-    if r.status_code != 200:
-        raise HTTPException(status_code=r.status_code, detail=r.text)
-    data = r.json()
-    tweets = [
-        {
-            "id": t.get("id"),
-            "text": t.get("text"),
-            "created_at": t.get("created_at"),
-            "metrics": t.get("public_metrics", {}),
-        }
-        for t in data.get("data", [])
-    ]
-    return {"tweets": tweets}
+    tweets, age, state = await TWEETS.get(query)
+    set_cache_headers(response, age, state)
+    return {"tweets": tweets[:limit]}
 
 
 if __name__ == "__main__":
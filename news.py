@@ -0,0 +1,377 @@
+"""
+Cricket News Aggregation
+
+Fetches every RSS source concurrently, each under its own timeout, and keeps
+the merged, newest-first item list in memory. /api/news serves that list, so
+request latency no longer depends on the number or speed of feeds. A
+background loop refreshes every NEWS_REFRESH_INTERVAL seconds; a feed that
+fails or times out keeps its items from the previous refresh. Feeds are
+fetched with conditional GETs, so an unchanged feed is neither downloaded
+nor re-parsed.
+
+Items are merged into a long-lived NewsIndex that deduplicates syndicated
+stories by normalized link/GUID and by a title fingerprint, and keeps the
+newest NEWS_MAX_ITEMS in a min-heap ordered by published time. Each refresh
+only touches entries it has not seen before, and serving is O(k).
+
+Every new item is also appended to a NewsArchive, the full history behind
+cursor-paginated /api/news. The archive lives in the indexed "news"
+collection through database.py and is mirrored in a bounded in-memory list,
+which serves pages on its own when no database is configured or Mongo fails.
+Cursors encode the (published_ts, key) of the last item returned, so a page
+is an index range scan rather than a skip over everything before it.
+
+New items are also added to an in-memory inverted index (search.py) over
+title and summary, which answers /api/news/search with BM25 ranking.
+"""
+
+import asyncio
+import base64
+import bisect
+import calendar
+import hashlib
+import heapq
+import json
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import feedparser  # type: ignore
+from fastapi import HTTPException
+
+import database
+from search import InvertedIndex, tokenize
+from upstream import AsyncSingleFlight, http_get_conditional
+
+logger = logging.getLogger(__name__)
+
+NEWS_REFRESH_INTERVAL = float(os.getenv("NEWS_REFRESH_INTERVAL", "300"))
+NEWS_FEED_TIMEOUT = float(os.getenv("NEWS_FEED_TIMEOUT", "8"))
+# Entries taken from each feed per refresh; everything new goes to the archive
+NEWS_PER_FEED = int(os.getenv("NEWS_PER_FEED", "100"))
+NEWS_MAX_ITEMS = int(os.getenv("NEWS_MAX_ITEMS", "50"))
+NEWS_PAGE_SIZE = int(os.getenv("NEWS_PAGE_SIZE", "20"))
+NEWS_MAX_PAGE_SIZE = int(os.getenv("NEWS_MAX_PAGE_SIZE", "100"))
+# Items kept in the in-memory archive (the whole archive when there is no database)
+NEWS_ARCHIVE_MEMORY = int(os.getenv("NEWS_ARCHIVE_MEMORY", "5000"))
+NEWS_COLLECTION = "news"
+# Items held by the search index; the oldest are evicted beyond this
+NEWS_SEARCH_DOCS = int(os.getenv("NEWS_SEARCH_DOCS", "5000"))
+# How many item keys/fingerprints the dedupe index remembers
+NEWS_INDEX_SIZE = int(os.getenv("NEWS_INDEX_SIZE", "20000"))
+
+Item = Dict[str, Any]
+
+
+def entry_timestamp(entry: Any) -> float:
+    parsed = entry.get("published_parsed") or entry.get("updated_parsed")
+    return float(calendar.timegm(parsed)) if parsed else 0.0
+
+
+def normalize_entry(entry: Any, source: str) -> Item:
+    return {
+        "guid": entry.get("id"),
+        "title": entry.get("title"),
+        "link": entry.get("link"),
+        "summary": entry.get("summary", ""),
+        "published": entry.get("published", entry.get("updated")),
+        "published_ts": entry_timestamp(entry),
+        "source": source,
+        "image": (entry.get("media_thumbnail") or entry.get("media_content") or [{}])[0].get("url"),
+    }
+
+
+def parse_feed(body: bytes) -> List[Item]:
+    feed = feedparser.parse(body)
+    source = feed.feed.get("title", "RSS")
+    return [normalize_entry(e, source) for e in feed.entries[:NEWS_PER_FEED]]
+
+
+async def fetch_feed(src: str, timeout: float = NEWS_FEED_TIMEOUT) -> List[Item]:
+    """Fetch and parse one feed; an unchanged feed (304) reuses the last parsed items"""
+    r, items = await http_get_conditional(src, parse_feed, timeout=timeout, offload=True)
+    if items is None:
+        r.raise_for_status()
+        raise ValueError(f"unexpected status {r.status_code}")
+    return items
+
+
+def normalize_link(link: Optional[str]) -> Optional[str]:
+    """Canonical form of a story URL: no scheme, www., fragment, tracking params or trailing slash"""
+    if not link:
+        return None
+    parts = urlsplit(link.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(parts.query) if not k.lower().startswith("utm_")))
+    return f"{host}{parts.path.rstrip('/')}" + (f"?{query}" if query else "")
+
+
+def title_fingerprint(title: Optional[str]) -> Optional[str]:
+    words = re.findall(r"[a-z0-9]+", (title or "").lower())
+    return " ".join(words) if words else None
+
+
+class NewsIndex:
+    """Deduplicating index of news items with a top-k heap by published time"""
+
+    def __init__(self, max_items: int = NEWS_MAX_ITEMS, max_keys: int = NEWS_INDEX_SIZE):
+        self.max_items = max_items
+        self.max_keys = max_keys
+        self._seen: "OrderedDict[str, None]" = OrderedDict()
+        # (published_ts, key, item); keys are unique so items are never compared
+        self._heap: List[Tuple[float, str, Item]] = []
+        self._top: Optional[List[Item]] = []
+
+    def keys(self, item: Item) -> List[str]:
+        keys = []
+        link = normalize_link(item.get("link"))
+        if link:
+            keys.append(f"link:{link}")
+        if item.get("guid"):
+            keys.append(f"guid:{item['guid']}")
+        fingerprint = title_fingerprint(item.get("title"))
+        if fingerprint:
+            keys.append(f"title:{fingerprint}")
+        return keys
+
+    def _remember(self, keys: List[str]):
+        for key in keys:
+            self._seen[key] = None
+            self._seen.move_to_end(key)
+        while len(self._seen) > self.max_keys:
+            self._seen.popitem(last=False)
+
+    def add(self, item: Item) -> Optional[Item]:
+        """Index an item; returns it with its `key`, or None if it duplicates one already seen"""
+        keys = self.keys(item)
+        if not keys or any(key in self._seen for key in keys):
+            return None
+        self._remember(keys)
+        item = {**item, "key": item.get("key") or hashlib.sha1(keys[0].encode()).hexdigest()[:20]}
+        entry = (item.get("published_ts") or 0.0, item["key"], item)
+        if len(self._heap) < self.max_items:
+            heapq.heappush(self._heap, entry)
+        elif entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+        else:
+            return item
+        self._top = None
+        return item
+
+    def merge(self, items: List[Item]) -> List[Item]:
+        """Index a batch and return only the items that were new"""
+        added = []
+        for item in items:
+            new = self.add(item)
+            if new is not None:
+                added.append(new)
+        return added
+
+    def top(self) -> List[Item]:
+        """Newest items first; rebuilt only after the heap changes"""
+        if self._top is None:
+            self._top = [item for _, _, item in sorted(self._heap, key=lambda e: e[:2], reverse=True)]
+        return self._top
+
+
+def encode_cursor(item: Item) -> str:
+    raw = json.dumps([item.get("published_ts") or 0.0, item["key"]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[float, str]:
+    try:
+        ts, key = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return float(ts), str(key)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _public(doc: Item) -> Item:
+    return {k: v for k, v in doc.items() if k not in ("_id", "created_at", "updated_at")}
+
+
+class NewsArchive:
+    """Full news history ordered by (published_ts, key), in Mongo with a bounded memory mirror"""
+
+    def __init__(self, memory_size: int = NEWS_ARCHIVE_MEMORY):
+        self.memory_size = memory_size
+        # Ascending (published_ts, key) and the matching items
+        self._order: List[Tuple[float, str]] = []
+        self._items: List[Item] = []
+        self._indexed = False
+
+    def _remember(self, items: List[Item]):
+        for item in items:
+            pos = (item.get("published_ts") or 0.0, item["key"])
+            i = bisect.bisect_left(self._order, pos)
+            if i < len(self._order) and self._order[i] == pos:
+                continue
+            self._order.insert(i, pos)
+            self._items.insert(i, item)
+        overflow = len(self._order) - self.memory_size
+        if overflow > 0:
+            del self._order[:overflow]
+            del self._items[:overflow]
+
+    def _ensure_indexes(self):
+        if not self._indexed:
+            database.ensure_index(NEWS_COLLECTION, [("key", 1)], unique=True)
+            database.ensure_index(NEWS_COLLECTION, [("published_ts", -1), ("key", -1)])
+            self._indexed = True
+
+    async def add(self, items: List[Item]):
+        if not items:
+            return
+        self._remember(items)
+        if database.db is None:
+            return
+        try:
+            def write():
+                self._ensure_indexes()
+                database.insert_missing_documents(NEWS_COLLECTION, "key", items)
+
+            await asyncio.to_thread(write)
+        except Exception as e:
+            logger.warning("archiving news failed: %s", str(e)[:200])
+
+    async def recent(self, limit: int) -> List[Item]:
+        """Newest archived items, used to seed the index after a restart"""
+        if database.db is not None:
+            try:
+                docs = await asyncio.to_thread(
+                    database.get_documents, NEWS_COLLECTION, None, limit, [("published_ts", -1), ("key", -1)]
+                )
+                return [_public(doc) for doc in docs]
+            except Exception as e:
+                logger.warning("loading news archive failed: %s", str(e)[:200])
+        return self._memory_page(None, limit)
+
+    def _memory_page(self, after: Optional[Tuple[float, str]], limit: int) -> List[Item]:
+        end = len(self._order) if after is None else bisect.bisect_left(self._order, after)
+        return self._items[max(0, end - limit):end][::-1]
+
+    async def page(self, after: Optional[Tuple[float, str]], limit: int) -> List[Item]:
+        """Up to `limit` items older than the `after` position, newest first"""
+        if database.db is not None:
+            filter_dict = None
+            if after is not None:
+                ts, key = after
+                filter_dict = {"$or": [{"published_ts": {"$lt": ts}}, {"published_ts": ts, "key": {"$lt": key}}]}
+            try:
+                docs = await asyncio.to_thread(
+                    database.get_documents, NEWS_COLLECTION, filter_dict, limit, [("published_ts", -1), ("key", -1)]
+                )
+                return [_public(doc) for doc in docs]
+            except Exception as e:
+                logger.warning("reading news archive failed, serving from memory: %s", str(e)[:200])
+        return self._memory_page(after, limit)
+
+
+class NewsAggregator:
+    """Merged, newest-first news items from all sources, refreshed in the background"""
+
+    def __init__(self, sources: List[str], interval: float = NEWS_REFRESH_INTERVAL,
+                 feed_timeout: float = NEWS_FEED_TIMEOUT, max_items: int = NEWS_MAX_ITEMS):
+        self.sources = sources
+        self.interval = interval
+        self.feed_timeout = feed_timeout
+        self.max_items = max_items
+        self.index = NewsIndex(max_items=max_items)
+        self.archive = NewsArchive()
+        self.search_index = InvertedIndex(max_docs=NEWS_SEARCH_DOCS)
+        self.updated_at: Optional[float] = None
+        # Last parsed list per source; an identical object means a 304, nothing to merge
+        self._last_batch: Dict[str, List[Item]] = {}
+        self._flights = AsyncSingleFlight()
+        self._task: Optional[asyncio.Task] = None
+
+    async def _fetch(self, src: str) -> List[Item]:
+        # wait_for bounds the whole fetch+parse, not just the HTTP read
+        return await asyncio.wait_for(fetch_feed(src, self.feed_timeout), self.feed_timeout)
+
+    async def refresh(self) -> List[Item]:
+        return await self._flights.do("refresh", self._refresh)
+
+    async def _refresh(self) -> List[Item]:
+        results = await asyncio.gather(*(self._fetch(src) for src in self.sources), return_exceptions=True)
+        for src, result in zip(self.sources, results):
+            if isinstance(result, BaseException):
+                logger.warning("news feed %s failed: %s", src, str(result)[:200] or type(result).__name__)
+                continue
+            if self._last_batch.get(src) is result:
+                continue
+            self._last_batch[src] = result
+            added = self.index.merge(result)
+            self._index_for_search(added)
+            await self.archive.add(added)
+        self.updated_at = time.time()
+        return self.index.top()
+
+    def _index_for_search(self, items: List[Item]):
+        for item in items:
+            title = tokenize(item.get("title") or "")
+            # Title terms count twice so headline matches outrank passing mentions
+            self.search_index.add(item["key"], title + title + tokenize(item.get("summary") or ""), item)
+
+    async def load(self):
+        """Seed the indexes from the newest archived items so a restart neither re-archives nor starts empty"""
+        recent = await self.archive.recent(max(self.max_items, self.search_index.max_docs))
+        self.index.merge(recent[:self.max_items])
+        # Oldest first, so eviction order matches ingestion order
+        self._index_for_search(recent[::-1])
+
+    async def search(self, query: str, limit: int = 10) -> List[Item]:
+        if self.updated_at is None:
+            await self.refresh()
+        return [{**item, "score": round(score, 4)} for score, item in self.search_index.search(query, limit)]
+
+    async def page(self, cursor: Optional[str] = None, limit: int = NEWS_PAGE_SIZE) -> Dict[str, Any]:
+        """One page of news, newest first; pass the returned `next_cursor` to continue"""
+        limit = max(1, min(limit, NEWS_MAX_PAGE_SIZE))
+        after = decode_cursor(cursor) if cursor else None
+        if after is None and limit <= self.max_items:
+            # First page straight from the in-memory top-k
+            items = (await self.get())[:limit]
+        else:
+            if self.updated_at is None:
+                await self.refresh()
+            items = await self.archive.page(after, limit)
+        return {
+            "items": items,
+            "next_cursor": encode_cursor(items[-1]) if len(items) == limit else None,
+        }
+
+    @property
+    def items(self) -> List[Item]:
+        return self.index.top()
+
+    async def get(self) -> List[Item]:
+        if self.updated_at is None:
+            return await self.refresh()
+        return self.items
+
+    async def _run(self):
+        await self.load()
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.warning("news refresh failed: %s", str(e)[:200])
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
@@ -0,0 +1,264 @@
+"""
+Background Match Poller
+
+Owns the upstream refresh loop for match lists so HTTP handlers only read
+from memory. The poller fetches each list type (live/upcoming/completed) on
+its own cadence and writes the normalized cards into a MatchStore.
+
+The cadence adapts to match state: every card is classified into a phase
+(match_phase) from its status, starting_at, format and runs overs, and a list is
+re-polled at the shortest interval among its cards' phases:
+
+- final_overs: a limited-overs chase in its last FINAL_OVERS overs (seconds)
+- live: any other match in play (seconds)
+- starting_soon: starts within STARTING_SOON seconds, or is past its start
+  time without being live yet (minutes)
+- upcoming: starts within a day (tens of minutes)
+- far_future / completed: hours
+
+An empty live list is re-polled every idle interval to notice new matches,
+and the completed list is polled immediately when a match leaves the live list.
+Upstream QPS is therefore fixed by these intervals, regardless of traffic.
+An optional on_update callback is told about every successful poll so
+streaming endpoints can push changes. read() only returns a list while it is within its polling interval plus a
+grace period, so a stalled poller makes handlers fall back to on-demand fetching.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from providers import parse_start
+
+logger = logging.getLogger(__name__)
+
+MATCH_TYPES = ("live", "upcoming", "completed")
+
+# Card statuses that mean a match is not (or no longer) in play
+NOT_LIVE_STATUSES = {
+    "NS", "UPCOMING", "PREVIEW", "FINISHED", "COMPLETE", "COMPLETED", "RESULT",
+    "CANCL.", "CANCELLED", "ABAN.", "ABANDONED", "POSTP.", "POSTPONED",
+}
+
+FINISHED_STATUSES = {
+    "FINISHED", "COMPLETE", "COMPLETED", "RESULT",
+    "CANCL.", "CANCELLED", "ABAN.", "ABANDONED",
+}
+
+FINAL_OVERS = 5
+# Overs per innings for limited-overs formats, keyed by the card's `format`;
+# any other format (Test, first-class) has no final overs
+FORMAT_OVERS = {"T10": 10, "T20": 20, "T20I": 20, "ODI": 50, "LIST A": 50}
+STARTING_SOON = 3600.0
+
+# Default polling interval in seconds per phase
+PHASE_INTERVALS = {
+    "final_overs": 2.0,
+    "live": 5.0,
+    "starting_soon": 60.0,
+    "upcoming": 900.0,
+    "far_future": 21600.0,
+    "completed": 21600.0,
+}
+
+Card = Dict[str, Any]
+FetchCards = Callable[[str], Awaitable[List[Card]]]
+OnUpdate = Callable[[str, List[Card], Optional[List[Card]]], None]
+
+
+def is_live(card: Card) -> bool:
+    status = (card.get("status") or "").upper()
+    return bool(status) and status not in NOT_LIVE_STATUSES
+
+
+def in_final_overs(card: Card) -> bool:
+    """True for a limited-overs chase within FINAL_OVERS of its scheduled end.
+
+    The overs limit comes from the card's `format` (FORMAT_OVERS); Tests,
+    first-class matches and cards without a known format never qualify.
+    """
+    limit = FORMAT_OVERS.get(str(card.get("format") or "").upper())
+    if limit is None:
+        return False
+    runs = [r for r in (card.get("runs") or []) if isinstance(r, dict)]
+    if len(runs) < 2:
+        return False
+    current = max(runs, key=lambda r: r.get("inning") or 0)
+    if (current.get("inning") or len(runs)) != 2:
+        return False
+    try:
+        overs = float(current.get("overs") or 0)
+    except (TypeError, ValueError):
+        return False
+    return overs >= limit - FINAL_OVERS
+
+
+def match_phase(card: Card, now: Optional[float] = None) -> str:
+    status = (card.get("status") or "").upper()
+    if status in FINISHED_STATUSES:
+        return "completed"
+    if is_live(card):
+        return "final_overs" if in_final_overs(card) else "live"
+    start = parse_start(card.get("starting_at"))
+    if start is None:
+        return "upcoming"
+    until = start - (time.time() if now is None else now)
+    if until <= STARTING_SOON:
+        return "starting_soon"
+    if until <= 86400:
+        return "upcoming"
+    return "far_future"
+
+
+class MatchStore:
+    """Latest normalized cards per match type"""
+
+    def __init__(self):
+        self._lists: Dict[str, Tuple[float, List[Card]]] = {}
+
+    def put(self, type: str, cards: List[Card]):
+        self._lists[type] = (time.monotonic(), cards)
+
+    def get(self, type: str) -> Optional[Tuple[List[Card], float]]:
+        """Return (cards, age_seconds) or None if the type was never polled"""
+        entry = self._lists.get(type)
+        if entry is None:
+            return None
+        stored_at, cards = entry
+        return cards, time.monotonic() - stored_at
+
+
+class MatchPoller:
+    """Polls the provider for every match type and fills a MatchStore"""
+
+    def __init__(self, fetch: FetchCards, store: MatchStore, intervals: Optional[Dict[str, float]] = None,
+                 idle_interval: float = 60.0, grace: float = 120.0, on_update: Optional[OnUpdate] = None):
+        self.fetch = fetch
+        self.store = store
+        self.on_update = on_update
+        self.intervals = {**PHASE_INTERVALS, **(intervals or {})}
+        self.idle_interval = idle_interval
+        self.grace = grace
+        self._interval: Dict[str, float] = {}
+        self._wake: Dict[str, asyncio.Event] = {}
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def running(self) -> bool:
+        return any(not t.done() for t in self._tasks)
+
+    def next_interval(self, type: str, cards: List[Card]) -> float:
+        now = time.time()
+        interval = min((self.intervals[match_phase(c, now)] for c in cards), default=None)
+        if type == "live":
+            return min(interval, self.idle_interval) if interval is not None else self.idle_interval
+        return interval if interval is not None else self.intervals["completed"]
+
+    def poke(self, type: str):
+        """Poll `type` now instead of waiting out its interval"""
+        event = self._wake.get(type)
+        if event is not None:
+            event.set()
+
+    async def poll(self, type: str):
+        previous = self.store.get(type)
+        try:
+            cards = await self.fetch(type)
+        except Exception as e:
+            logger.warning("poll %s failed: %s", type, str(e)[:200])
+            cards = previous[0] if previous else []
+        else:
+            self.store.put(type, cards)
+            if self.on_update is not None:
+                try:
+                    self.on_update(type, cards, previous[0] if previous else None)
+                except Exception:
+                    logger.exception("on_update for %s failed", type)
+            if type == "live" and previous is not None:
+                live_ids = {c.get("id") for c in cards if is_live(c)}
+                if any(is_live(c) and c.get("id") not in live_ids for c in previous[0]):
+                    self.poke("completed")
+        self._interval[type] = self.next_interval(type, cards)
+
+    def read(self, type: str) -> Optional[Tuple[List[Card], float]]:
+        """Return (cards, age_seconds) if the polled list for `type` is still trustworthy"""
+        entry = self.store.get(type)
+        if entry is None or not self.running:
+            return None
+        if entry[1] > self._interval.get(type, 0.0) + self.grace:
+            return None
+        return entry
+
+    async def _run(self, type: str):
+        # One loop per type so a slow fixtures call never delays livescores
+        wake = self._wake[type]
+        while True:
+            wake.clear()
+            await self.poll(type)
+            try:
+                await asyncio.wait_for(wake.wait(), self._interval[type])
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        if not self.running:
+            loop = asyncio.get_running_loop()
+            self._wake = {t: asyncio.Event() for t in MATCH_TYPES}
+            self._tasks = [loop.create_task(self._run(t)) for t in MATCH_TYPES]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+class MatchWatcher:
+    """Refreshes individual matches only while at least one client watches them.
+
+    Matches are identified by any hashable key, e.g. (provider, match_id).
+    `refresh(key)` does the work (fetch, diff, publish) and returns the
+    number of seconds to wait before the next refresh.
+    """
+
+    def __init__(self, refresh: Callable[[Hashable], Awaitable[float]], retry_interval: float = 30.0):
+        self.refresh = refresh
+        self.retry_interval = retry_interval
+        self._watchers: Dict[Hashable, int] = {}
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+
+    def watching(self) -> Dict[Hashable, int]:
+        return dict(self._watchers)
+
+    def watch(self, match_id: Hashable):
+        self._watchers[match_id] = self._watchers.get(match_id, 0) + 1
+        if match_id not in self._tasks:
+            self._tasks[match_id] = asyncio.get_running_loop().create_task(self._run(match_id))
+
+    def unwatch(self, match_id: Hashable):
+        count = self._watchers.get(match_id, 0) - 1
+        if count > 0:
+            self._watchers[match_id] = count
+            return
+        self._watchers.pop(match_id, None)
+        task = self._tasks.pop(match_id, None)
+        if task is not None:
+            task.cancel()
+
+    async def _run(self, match_id: Hashable):
+        while True:
+            try:
+                interval = await self.refresh(match_id)
+            except Exception as e:
+                logger.warning("refresh match %s failed: %s", match_id, str(e)[:200])
+                interval = self.retry_interval
+            await asyncio.sleep(interval)
+
+    async def stop(self):
+        tasks = list(self._tasks.values())
+        self._tasks.clear()
+        self._watchers.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,180 @@
+"""
+Provider Adapters
+
+Registry of cricket data providers. Each provider registers one
+ProviderAdapter at import time with:
+
+- `fetch_list(type)`: raw match list for live/upcoming/completed
+- `normalize(raw, type)`: batch normalizer turning the whole raw list into
+  the common card shape (see card fields below)
+- `fetch_details(match_id, includes)`: raw details payload
+- `configured()`: whether credentials for it are present
+- `aliases`: other names accepted for it (e.g. in CRICKET_API_PROVIDER)
+- `normalize_live(details)`: (score snapshot, balls) from a details payload,
+  for the ball log and match streams; None when the provider's details carry
+  no ball-by-ball data
+
+Handlers and the provider router only go through the registry, so adding a
+provider means one normalizer plus one register() call. Normalizers are
+plain module-level functions over lists: nothing is rebuilt per request and
+per-batch constants (default status, lookups) are hoisted out of the loop.
+
+Common card fields: id, provider, status, note, format (T20, ODI, TEST...),
+runs [{team_id, inning, score, wickets, overs}], league_id,
+localteam/visitorteam {id, name, code}, venue {name, city}, starting_at
+(ISO 8601). `provider` matters because match ids are not portable.
+"""
+
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+Card = Dict[str, Any]
+Normalize = Callable[[List[Dict[str, Any]], str], List[Card]]
+NormalizeLive = Callable[[Dict[str, Any]], Tuple[Dict[str, Any], List[Dict[str, Any]]]]
+
+_EMPTY: Dict[str, Any] = {}
+
+
+class ProviderAdapter:
+    def __init__(self, name: str, fetch_list: Callable[[str], Awaitable[List[Dict[str, Any]]]], normalize: Normalize,
+                 fetch_details: Callable[[str, Tuple[str, ...]], Awaitable[Dict[str, Any]]],
+                 configured: Callable[[], bool], supports_includes: bool = False,
+                 aliases: Tuple[str, ...] = (), normalize_live: Optional[NormalizeLive] = None):
+        self.name = name
+        self.fetch_list = fetch_list
+        self.normalize = normalize
+        self.fetch_details = fetch_details
+        self.configured = configured
+        # Whether fetch_details narrows the upstream call to `includes`
+        self.supports_includes = supports_includes
+        self.aliases = aliases
+        self.normalize_live = normalize_live
+
+    async def cards(self, type: str) -> List[Card]:
+        return self.normalize(await self.fetch_list(type), type)
+
+
+ADAPTERS: Dict[str, ProviderAdapter] = {}
+_ALIASES: Dict[str, str] = {}
+
+
+def register(adapter: ProviderAdapter) -> ProviderAdapter:
+    ADAPTERS[adapter.name] = adapter
+    for alias in adapter.aliases:
+        _ALIASES[alias] = adapter.name
+    return adapter
+
+
+def get_adapter(name: Optional[str]) -> Optional[ProviderAdapter]:
+    """Adapter registered under `name` or one of its aliases (case-insensitive)"""
+    name = (name or "").lower()
+    return ADAPTERS.get(_ALIASES.get(name, name))
+
+
+def configured_providers(primary: Optional[str] = None) -> List[str]:
+    """Registered providers with credentials, `primary` first"""
+    names = [name for name, adapter in ADAPTERS.items() if adapter.configured()]
+    return sorted(names, key=lambda name: name != primary)
+
+
+def parse_start(value: Any) -> Optional[float]:
+    """Parse a starting_at value (ISO 8601 or epoch seconds/millis) to epoch seconds"""
+    if value in (None, ""):
+        return None
+    try:
+        if isinstance(value, (int, float)) or str(value).isdigit():
+            ts = float(value)
+            return ts / 1000 if ts > 1e11 else ts
+        dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def iso_start(value: Any) -> Optional[str]:
+    ts = parse_start(value)
+    if ts is None:
+        return value
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def normalize_sportmonks(matches: List[Dict[str, Any]], type: str) -> List[Card]:
+    default_status = type.upper()
+    cards = []
+    append = cards.append
+    for m in matches:
+        lt = m.get("localteam") or _EMPTY
+        vt = m.get("visitorteam") or _EMPTY
+        venue = m.get("venue") or _EMPTY
+        status = m.get("status")
+        append({
+            "id": m.get("id"),
+            "provider": "sportmonks",
+            "status": status.upper() if status else default_status,
+            "note": m.get("note"),
+            "format": (m.get("type") or "").upper() or None,
+            "runs": m.get("runs"),
+            "league_id": m.get("season_id"),
+            "localteam": {"id": lt.get("id"), "name": lt.get("name"), "code": lt.get("code")},
+            "visitorteam": {"id": vt.get("id"), "name": vt.get("name"), "code": vt.get("code")},
+            "venue": {"name": venue.get("name"), "city": venue.get("city")},
+            "starting_at": m.get("starting_at"),
+        })
+    return cards
+
+
+def live_sportmonks(details: Dict[str, Any]) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    fixture = details.get("data") or _EMPTY
+    score = {
+        "id": fixture.get("id"),
+        "status": fixture.get("status"),
+        "note": fixture.get("note"),
+        "runs": fixture.get("runs"),
+        "scoreboards": fixture.get("scoreboards"),
+    }
+    return score, fixture.get("balls") or []
+
+
+def cricbuzz_runs(score: Dict[str, Any], team1_id: Any, team2_id: Any) -> List[Dict[str, Any]]:
+    """matchScore {teamNScore: {inngsN: {...}}} as SportMonks-style runs, in innings order"""
+    runs = []
+    for team_key, team_id in (("team1Score", team1_id), ("team2Score", team2_id)):
+        for inning in (score.get(team_key) or _EMPTY).values():
+            if not isinstance(inning, dict):
+                continue
+            runs.append({
+                "team_id": team_id,
+                "inning": inning.get("inningsId"),
+                "score": inning.get("runs"),
+                "wickets": inning.get("wickets"),
+                "overs": inning.get("overs"),
+            })
+    runs.sort(key=lambda r: r["inning"] or 0)
+    return runs
+
+
+def normalize_cricbuzz(matches: List[Dict[str, Any]], type: str) -> List[Card]:
+    default_status = type.upper()
+    cards = []
+    append = cards.append
+    for m in matches:
+        t1 = m.get("team1") or _EMPTY
+        t2 = m.get("team2") or _EMPTY
+        venue = m.get("venueInfo") or _EMPTY
+        state = m.get("matchState") or m.get("status")
+        append({
+            "id": m.get("matchId") or m.get("id"),
+            "provider": "cricbuzz",
+            "status": state.upper() if state else default_status,
+            "note": m.get("status") or m.get("seriesName"),
+            "format": (m.get("matchFormat") or "").upper() or None,
+            "runs": cricbuzz_runs(m.get("matchScore") or _EMPTY, t1.get("teamId"), t2.get("teamId")),
+            "league_id": m.get("seriesId"),
+            "localteam": {"id": t1.get("teamId"), "name": t1.get("teamName"), "code": t1.get("teamSName")},
+            "visitorteam": {"id": t2.get("teamId"), "name": t2.get("teamName"), "code": t2.get("teamSName")},
+            "venue": {"name": venue.get("ground"), "city": venue.get("city")},
+            "starting_at": iso_start(m.get("startTime") or m.get("startDate")),
+        })
+    return cards
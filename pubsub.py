@@ -0,0 +1,134 @@
+"""
+In-Process Pub/Sub Hub
+
+Fans match updates out to streaming clients (SSE and WebSocket). Producers
+publish an event to a topic such as "matches:live" or "match:sportmonks:10001"; every
+subscriber to that topic gets it on its own bounded asyncio.Queue, so a
+single upstream change is delivered to all connected clients without any
+extra provider calls.
+
+Each event is serialized to JSON once at publish time and the same text is
+handed to every subscriber. Publishing never blocks: a subscriber whose
+queue is full is treated as a slow consumer and dropped (its queue is
+cleared and it receives CLOSED), so one stalled socket cannot hold memory
+or delay everyone else. Clients are expected to reconnect and resync.
+"""
+
+import asyncio
+import json
+from typing import Any, Dict, Iterable, Optional, Set
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), default=str)
+
+
+class Event:
+    __slots__ = ("topic", "event", "data", "data_json", "json")
+
+    def __init__(self, topic: str, event: str, data: Any):
+        self.topic = topic
+        self.event = event
+        self.data = data
+        self.data_json = _dumps(data)
+        # Full message for WebSocket clients, built from the pre-serialized data
+        self.json = f'{{"topic":{_dumps(topic)},"event":{_dumps(event)},"data":{self.data_json}}}'
+
+
+# Sentinel delivered to a subscriber that was dropped or closed
+CLOSED = Event("", "closed", None)
+
+
+class Subscription:
+    def __init__(self, hub: "Hub", topics: Iterable[str], maxsize: int):
+        self.hub = hub
+        self.topics: Set[str] = set(topics)
+        self.queue: "asyncio.Queue[Event]" = asyncio.Queue(maxsize=maxsize)
+        self.closed = False
+
+    def offer(self, event: Event) -> bool:
+        if self.closed:
+            return False
+        try:
+            self.queue.put_nowait(event)
+            return True
+        except asyncio.QueueFull:
+            self.hub.drop(self)
+            return False
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Event]:
+        """Next event (CLOSED once dropped), or None if nothing arrived within `timeout` seconds"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def subscribe(self, *topics: str):
+        self.hub.add_topics(self, topics)
+
+    def unsubscribe(self, *topics: str):
+        self.hub.remove_topics(self, topics)
+
+    def close(self):
+        self.hub.unsubscribe(self)
+
+
+class Hub:
+    """Topic-based fan-out to bounded per-subscriber queues"""
+
+    def __init__(self, queue_size: int = 64):
+        self.queue_size = queue_size
+        self._topics: Dict[str, Set[Subscription]] = {}
+        self.published = 0
+        self.dropped = 0
+
+    def subscribe(self, *topics: str) -> Subscription:
+        sub = Subscription(self, (), self.queue_size)
+        self.add_topics(sub, topics)
+        return sub
+
+    def add_topics(self, sub: Subscription, topics: Iterable[str]):
+        for topic in topics:
+            sub.topics.add(topic)
+            self._topics.setdefault(topic, set()).add(sub)
+
+    def remove_topics(self, sub: Subscription, topics: Iterable[str]):
+        for topic in list(topics):
+            sub.topics.discard(topic)
+            subs = self._topics.get(topic)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._topics[topic]
+
+    def unsubscribe(self, sub: Subscription):
+        sub.closed = True
+        self.remove_topics(sub, list(sub.topics))
+
+    def drop(self, sub: Subscription):
+        """Disconnect a slow consumer: forget its backlog and wake it with CLOSED"""
+        self.unsubscribe(sub)
+        self.dropped += 1
+        while not sub.queue.empty():
+            sub.queue.get_nowait()
+        sub.queue.put_nowait(CLOSED)
+
+    def subscribers(self, topic: str) -> int:
+        return len(self._topics.get(topic, ()))
+
+    def publish(self, topic: str, event: str, data: Any) -> int:
+        """Deliver an event to every subscriber of `topic`; returns how many accepted it"""
+        subs = self._topics.get(topic)
+        if not subs:
+            return 0
+        self.published += 1
+        message = Event(topic, event, data)
+        return sum(1 for sub in list(subs) if sub.offer(message))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "topics": len(self._topics),
+            "subscriptions": sum(len(s) for s in self._topics.values()),
+            "published": self.published,
+            "dropped": self.dropped,
+        }
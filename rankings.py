@@ -0,0 +1,181 @@
+"""
+ICC Rankings Snapshots
+
+ICC rankings change at most once a day, so /api/rankings is served from an
+in-memory snapshot per format (test/odi/t20) instead of calling the ICC site
+on every request. A background loop refreshes each format every
+RANKINGS_INTERVAL seconds (sooner after a failed or partial refresh) and
+persists the snapshot to the "ranking" collection through database.py, so a
+restart serves the last known rankings immediately even if ICC is down.
+
+A refresh fetches the four sections (teams, batting, bowling, allrounder)
+concurrently under one deadline; sections that fail keep their previous value.
+If every section fails and there is no earlier snapshot, the empty result is
+returned but not stored, so the next request retries.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException
+
+import database
+from upstream import AsyncSingleFlight, http_get_conditional
+
+logger = logging.getLogger(__name__)
+
+ICC_RANKINGS_BASE = os.getenv("ICC_RANKINGS_BASE", "https://www.icc-cricket.com/iccrankings/api")
+RANKING_FORMATS = ("test", "odi", "t20")
+RANKING_SECTIONS = ("teams", "batting", "bowling", "allrounder")
+# Overall deadline for the four concurrent ranking fetches
+RANKINGS_DEADLINE = float(os.getenv("RANKINGS_DEADLINE", "8"))
+RANKINGS_INTERVAL = float(os.getenv("RANKINGS_INTERVAL", "86400"))
+RANKINGS_RETRY_INTERVAL = float(os.getenv("RANKINGS_RETRY_INTERVAL", "900"))
+RANKINGS_COLLECTION = "ranking"
+
+
+async def fetch_ranking_section(format: str, section: str) -> Any:
+    url = f"{ICC_RANKINGS_BASE.rstrip('/')}/{format}/men/{section}"
+    r, data = await http_get_conditional(url, json.loads, timeout=RANKINGS_DEADLINE)
+    if data is None:
+        raise HTTPException(status_code=r.status_code, detail=r.text[:200])
+    return data
+
+
+async def fetch_rankings(format: str) -> Dict[str, Any]:
+    """Fetch team and player rankings concurrently within RANKINGS_DEADLINE seconds.
+    Sections that fail or miss the deadline come back empty and are listed in `missing`.
+    """
+    tasks = {section: asyncio.create_task(fetch_ranking_section(format, section)) for section in RANKING_SECTIONS}
+    done, pending = await asyncio.wait(tasks.values(), timeout=RANKINGS_DEADLINE)
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+    sections: Dict[str, Any] = {}
+    missing: List[str] = []
+    for section, task in tasks.items():
+        if task in done and task.exception() is None:
+            sections[section] = task.result()
+        else:
+            sections[section] = []
+            missing.append(section)
+    return {
+        "format": format,
+        "teams": sections["teams"],
+        "players": {cat: sections[cat] for cat in RANKING_SECTIONS if cat != "teams"},
+        "partial": bool(missing),
+        "missing": missing,
+    }
+
+
+def _public(doc: Dict[str, Any]) -> Dict[str, Any]:
+    fetched_at = doc.get("fetched_at")
+    return {
+        "format": doc.get("format"),
+        "teams": doc.get("teams") or [],
+        "players": doc.get("players") or {},
+        "partial": bool(doc.get("partial")),
+        "missing": list(doc.get("missing") or []),
+        "updated_at": fetched_at.isoformat() if isinstance(fetched_at, datetime) else fetched_at,
+    }
+
+
+class RankingsStore:
+    """Per-format rankings snapshots kept in memory and mirrored to Mongo"""
+
+    def __init__(self, formats=RANKING_FORMATS, interval: float = RANKINGS_INTERVAL,
+                 retry_interval: float = RANKINGS_RETRY_INTERVAL):
+        self.formats = formats
+        self.interval = interval
+        self.retry_interval = retry_interval
+        self._snapshots: Dict[str, Dict[str, Any]] = {}
+        self._next_due: Dict[str, float] = {}
+        self._flights = AsyncSingleFlight()
+        self._task: Optional[asyncio.Task] = None
+
+    async def load(self):
+        """Seed memory from the last persisted snapshots"""
+        if database.db is None:
+            return
+        try:
+            docs = await asyncio.to_thread(database.get_documents, RANKINGS_COLLECTION)
+        except Exception as e:
+            logger.warning("loading rankings snapshots failed: %s", str(e)[:200])
+            return
+        now = datetime.now(timezone.utc)
+        for doc in docs:
+            format = doc.get("format")
+            if format not in self.formats:
+                continue
+            self._snapshots[format] = _public(doc)
+            fetched_at = doc.get("fetched_at")
+            if isinstance(fetched_at, datetime) and not doc.get("partial"):
+                if fetched_at.tzinfo is None:
+                    fetched_at = fetched_at.replace(tzinfo=timezone.utc)
+                age = (now - fetched_at).total_seconds()
+                self._next_due[format] = time.monotonic() + self.interval - max(0.0, age)
+
+    async def refresh(self, format: str) -> Dict[str, Any]:
+        return await self._flights.do(format, lambda: self._refresh(format))
+
+    async def _refresh(self, format: str) -> Dict[str, Any]:
+        self._next_due[format] = time.monotonic() + self.retry_interval
+        fresh = await fetch_rankings(format)
+        previous = self._snapshots.get(format)
+        if len(fresh["missing"]) == len(RANKING_SECTIONS):
+            # Nothing fetched: never cache or persist an empty snapshot, so the
+            # next request tries ICC again
+            return previous if previous is not None else {**fresh, "updated_at": None}
+        if previous is not None:
+            # Keep last known sections instead of replacing them with empty lists
+            for section in fresh["missing"]:
+                if section == "teams":
+                    fresh["teams"] = previous["teams"]
+                else:
+                    fresh["players"][section] = previous["players"].get(section, [])
+        fetched_at = datetime.now(timezone.utc)
+        snapshot = {**fresh, "updated_at": fetched_at.isoformat()}
+        self._snapshots[format] = snapshot
+        if not fresh["partial"]:
+            self._next_due[format] = time.monotonic() + self.interval
+        if database.db is not None:
+            try:
+                await asyncio.to_thread(
+                    database.upsert_document, RANKINGS_COLLECTION, {"format": format}, {**fresh, "fetched_at": fetched_at}
+                )
+            except Exception as e:
+                logger.warning("persisting %s rankings failed: %s", format, str(e)[:200])
+        return snapshot
+
+    async def get(self, format: str) -> Dict[str, Any]:
+        snapshot = self._snapshots.get(format)
+        if snapshot is not None:
+            return snapshot
+        return await self.refresh(format)
+
+    async def _run(self):
+        await self.load()
+        while True:
+            for format in self.formats:
+                if self._next_due.get(format, 0.0) <= time.monotonic():
+                    try:
+                        await self.refresh(format)
+                    except Exception as e:
+                        logger.warning("refreshing %s rankings failed: %s", format, str(e)[:200])
+            wait = min(self._next_due.get(f, 0.0) for f in self.formats) - time.monotonic()
+            await asyncio.sleep(max(wait, 1.0))
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
@@ -0,0 +1,249 @@
+"""
+Provider Rate-Limit Budgets
+
+One token bucket per upstream provider (SportMonks, RapidAPI/Cricbuzz, X)
+sized from its quota, so calls are paced before the provider starts
+rejecting them. Responses are fed back through `observe`: remaining/reset
+headers (or SportMonks' `rate_limit` body block) shrink the local budget to
+what the provider reports, and a 429 blocks the provider until Retry-After.
+
+Calls are scheduled by priority. LIVE (live matches, open streams) may spend
+every token, NORMAL (user requests) must leave a reserve for LIVE, and
+BACKGROUND (polling upcoming/completed lists) must leave a larger one. A
+call that cannot get a token within its priority's wait budget raises
+BudgetExhausted, which callers turn into a cached (possibly stale) response
+instead of a provider error. Waiters are served strictly by priority.
+
+The priority of the current call is taken from the PRIORITY context
+variable, so it follows a request or poll through nested helpers and into
+single-flight tasks without threading an argument everywhere.
+"""
+
+import asyncio
+import contextvars
+import email.utils
+import heapq
+import itertools
+import os
+import threading
+import time
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from fastapi import HTTPException
+
+LIVE, NORMAL, BACKGROUND = 0, 1, 2
+PRIORITY_NAMES = {LIVE: "live", NORMAL: "normal", BACKGROUND: "background"}
+PRIORITY: "contextvars.ContextVar[int]" = contextvars.ContextVar("upstream_priority", default=NORMAL)
+
+# Share of the bucket each priority must leave untouched for higher ones
+RESERVE = {LIVE: 0.0, NORMAL: 0.2, BACKGROUND: 0.5}
+# Seconds a call may queue for a token before degrading to cached data
+MAX_WAIT = {
+    LIVE: float(os.getenv("RATE_WAIT_LIVE", "3")),
+    NORMAL: float(os.getenv("RATE_WAIT_NORMAL", "1")),
+    BACKGROUND: float(os.getenv("RATE_WAIT_BACKGROUND", "0")),
+}
+# Block after a 429 without a usable Retry-After/reset
+DEFAULT_BACKOFF = 30.0
+
+_REMAINING_HEADERS = ("x-rate-limit-remaining", "x-ratelimit-requests-remaining", "x-ratelimit-remaining", "ratelimit-remaining")
+_RESET_HEADERS = ("x-rate-limit-reset", "x-ratelimit-requests-reset", "x-ratelimit-reset", "ratelimit-reset")
+
+
+class BudgetExhausted(HTTPException):
+    def __init__(self, provider: str, retry_after: float):
+        super().__init__(
+            status_code=429,
+            detail=f"{provider} rate budget exhausted",
+            headers={"Retry-After": str(max(1, int(retry_after + 0.999)))},
+        )
+        self.provider = provider
+        self.retry_after = retry_after
+
+
+def _number(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _reset_in(value: Any, now: float) -> Optional[float]:
+    """Seconds until reset from a header that is either a delay or a UNIX timestamp"""
+    seconds = _number(value)
+    if seconds is None:
+        return None
+    return max(0.0, seconds - now) if seconds > 1e9 else seconds
+
+
+def _retry_after(value: Any, now: float) -> Optional[float]:
+    seconds = _number(value)
+    if seconds is not None:
+        return max(0.0, seconds)
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - now)
+    except (TypeError, ValueError):
+        return None
+
+
+class ProviderBudget:
+    """Token bucket with priority reserves and a priority-ordered wait queue"""
+
+    def __init__(self, name: str, limit: float, window: float, burst: Optional[float] = None):
+        self.name = name
+        self.rate = limit / window
+        self.capacity = max(1.0, burst if burst is not None else limit / 10)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.granted = {p: 0 for p in PRIORITY_NAMES}
+        self.exhausted = {p: 0 for p in PRIORITY_NAMES}
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _floor(self, priority: int) -> float:
+        return self.capacity * RESERVE[priority]
+
+    def _delay(self, priority: int, now: float) -> float:
+        """Seconds until a call of `priority` could get a token"""
+        need = self._floor(priority) + 1 - self.tokens
+        return max(self.blocked_until - now, need / self.rate if need > 0 else 0.0)
+
+    def try_acquire(self, priority: int = NORMAL) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if now < self.blocked_until or self.tokens - 1 < self._floor(priority):
+                return False
+            self.tokens -= 1
+            self.granted[priority] += 1
+            return True
+
+    def acquire_nowait(self, priority: Optional[int] = None):
+        """Take a token or raise BudgetExhausted (for synchronous callers)"""
+        priority = PRIORITY.get() if priority is None else priority
+        if not self.try_acquire(priority):
+            self.exhausted[priority] += 1
+            raise BudgetExhausted(self.name, self._delay(priority, time.monotonic()))
+
+    async def acquire(self, priority: Optional[int] = None, max_wait: Optional[float] = None):
+        """Wait for a token, at most `max_wait` seconds (by default MAX_WAIT[priority])"""
+        priority = PRIORITY.get() if priority is None else priority
+        max_wait = MAX_WAIT[priority] if max_wait is None else max_wait
+        ahead = any(p <= priority and not f.done() for p, _, f in self._waiters)
+        if not ahead and self.try_acquire(priority):
+            return
+        delay = self._delay(priority, time.monotonic())
+        if max_wait <= 0 or delay > max_wait:
+            self.exhausted[priority] += 1
+            raise BudgetExhausted(self.name, delay)
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        self._schedule()
+        try:
+            await asyncio.wait_for(future, max_wait)
+        except asyncio.TimeoutError:
+            self.exhausted[priority] += 1
+            raise BudgetExhausted(self.name, self._delay(priority, time.monotonic()))
+
+    def _schedule(self):
+        while self._waiters and self._waiters[0][2].done():
+            heapq.heappop(self._waiters)
+        if not self._waiters:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            delay = self._delay(self._waiters[0][0], now)
+        self._timer = asyncio.get_running_loop().call_later(delay, self._pump)
+
+    def _pump(self):
+        self._timer = None
+        while self._waiters:
+            priority, _, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+            elif self.try_acquire(priority):
+                heapq.heappop(self._waiters)
+                future.set_result(None)
+            else:
+                break
+        self._schedule()
+
+    def observe(self, status_code: int, headers: Mapping[str, str], body: Any = None):
+        """Align the bucket with what the provider reports about our quota"""
+        now = time.time()
+        headers = {k.lower(): v for k, v in headers.items()}
+        remaining = reset = None
+        for name in _REMAINING_HEADERS:
+            if name in headers:
+                remaining = _number(headers[name])
+                break
+        for name in _RESET_HEADERS:
+            if name in headers:
+                reset = _reset_in(headers[name], now)
+                break
+        if isinstance(body, dict) and isinstance(body.get("rate_limit"), dict):
+            remaining = _number(body["rate_limit"].get("remaining"))
+            reset = _number(body["rate_limit"].get("resets_in_seconds"))
+        block = None
+        if status_code == 429:
+            block = _retry_after(headers.get("retry-after"), now) or reset or DEFAULT_BACKOFF
+        elif remaining is not None and remaining < 1:
+            block = reset or DEFAULT_BACKOFF
+        with self._lock:
+            self._refill(time.monotonic())
+            if remaining is not None:
+                self.tokens = min(self.tokens, remaining)
+            if block is not None:
+                self.tokens = 0.0
+                self.blocked_until = max(self.blocked_until, time.monotonic() + block)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            return {
+                "tokens": round(self.tokens, 2),
+                "capacity": self.capacity,
+                "rate_per_s": round(self.rate, 4),
+                "blocked_for": round(max(0.0, self.blocked_until - now), 1),
+                "waiting": sum(1 for _, _, f in self._waiters if not f.done()),
+                "granted": {PRIORITY_NAMES[p]: n for p, n in self.granted.items()},
+                "exhausted": {PRIORITY_NAMES[p]: n for p, n in self.exhausted.items()},
+            }
+
+
+def budget_from_env(name: str, limit: float, window: float) -> ProviderBudget:
+    prefix = name.upper()
+    burst = os.getenv(f"{prefix}_RATE_BURST")
+    return ProviderBudget(
+        name,
+        limit=float(os.getenv(f"{prefix}_RATE_LIMIT", str(limit))),
+        window=float(os.getenv(f"{prefix}_RATE_WINDOW", str(window))),
+        burst=float(burst) if burst else None,
+    )
+
+
+# Defaults follow the providers' published plans; override per deployment
+BUDGETS: Dict[str, ProviderBudget] = {
+    "sportmonks": budget_from_env("sportmonks", 3000, 3600),
+    "rapidapi": budget_from_env("rapidapi", 300, 60),
+    "x": budget_from_env("x", 450, 900),
+}
+
+
+def budget(name: str) -> ProviderBudget:
+    return BUDGETS[name]
+
+
+def budget_stats() -> Dict[str, Any]:
+    return {name: b.stats() for name, b in BUDGETS.items()}
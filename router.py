@@ -0,0 +1,124 @@
+"""
+Provider Router
+
+Routes a request across every configured provider instead of only the one
+picked by CRICKET_API_PROVIDER at startup. Each provider's fetch returns the
+same normalized card shape, so any of them can answer.
+
+- failover (default): try providers in preference order; a provider that
+  errors, is rate-limited or circuit-open, or takes longer than
+  `attempt_timeout`, hands over to the next one. The last provider (or the
+  only one) is not cut short, since there is nothing to hand over to.
+- race: query all providers at once and return the first valid answer,
+  cancelling the rest. Faster tails, but every race spends quota on each
+  provider, so it is opt-in. An `empty` answer (e.g. no live matches) does
+  not win: it is only returned once every provider has answered empty or
+  failed, so one provider's empty list cannot hide another's matches.
+
+When no provider answers, NoProviderAvailable (503) is raised, so callers can
+fall back to cached data. A lone provider's HTTPException (e.g. a 404) is
+raised as-is.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+FAILOVER, RACE = "failover", "race"
+
+Fetch = Callable[[str], Awaitable[Any]]
+
+
+def _describe(e: BaseException) -> str:
+    return str(getattr(e, "detail", None) or e)[:100] or type(e).__name__
+
+
+class NoProviderAvailable(HTTPException):
+    def __init__(self, errors: Dict[str, BaseException]):
+        detail = "; ".join(f"{name}: {_describe(e)}" for name, e in errors.items()) or "no provider configured"
+        super().__init__(status_code=503, detail=detail)
+        self.errors = errors
+
+
+class ProviderRouter:
+    def __init__(self, fetchers: Dict[str, Fetch], order: Sequence[str], mode: str = FAILOVER,
+                 attempt_timeout: Optional[float] = None,
+                 valid: Callable[[Any], bool] = lambda result: result is not None,
+                 empty: Callable[[Any], bool] = lambda result: False):
+        self.fetchers = fetchers
+        self.order = [name for name in order if name in fetchers]
+        self.mode = mode
+        self.attempt_timeout = attempt_timeout
+        self.valid = valid
+        self.empty = empty
+        self.served: Dict[str, int] = {name: 0 for name in self.order}
+        self.failures: Dict[str, int] = {name: 0 for name in self.order}
+
+    async def _attempt(self, name: str, arg: str, timeout: Optional[float] = None) -> Any:
+        try:
+            result = await asyncio.wait_for(self.fetchers[name](arg), timeout)
+        except asyncio.TimeoutError:
+            raise asyncio.TimeoutError(f"no answer within {timeout}s") from None
+        if not self.valid(result):
+            raise ValueError(f"invalid result from {name}")
+        return result
+
+    async def fetch(self, arg: str) -> Tuple[str, Any]:
+        """Return (provider, result) from the first provider that answers validly"""
+        if not self.order:
+            raise NoProviderAvailable({})
+        if self.mode == RACE and len(self.order) > 1:
+            return await self._race(arg)
+        return await self._failover(arg)
+
+    def _won(self, name: str, result: Any) -> Tuple[str, Any]:
+        self.served[name] += 1
+        return name, result
+
+    def _failed(self, errors: Dict[str, BaseException], name: str, e: BaseException):
+        self.failures[name] += 1
+        errors[name] = e
+        logger.warning("provider %s failed: %s", name, _describe(e))
+
+    async def _failover(self, arg: str) -> Tuple[str, Any]:
+        errors: Dict[str, BaseException] = {}
+        last = self.order[-1]
+        for name in self.order:
+            timeout = None if name == last else self.attempt_timeout
+            try:
+                return self._won(name, await self._attempt(name, arg, timeout))
+            except Exception as e:
+                self._failed(errors, name, e)
+        error = errors[last]
+        if len(errors) == 1 and isinstance(error, HTTPException):
+            raise error
+        raise NoProviderAvailable(errors)
+
+    async def _race(self, arg: str) -> Tuple[str, Any]:
+        errors: Dict[str, BaseException] = {}
+        fallback: Optional[Tuple[str, Any]] = None
+        tasks = {asyncio.ensure_future(self._attempt(name, arg, self.attempt_timeout)): name for name in self.order}
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        self._failed(errors, tasks[task], task.exception())
+                    elif not self.empty(task.result()):
+                        return self._won(tasks[task], task.result())
+                    elif fallback is None:
+                        fallback = (tasks[task], task.result())
+        finally:
+            for task in pending:
+                task.cancel()
+        if fallback is not None:
+            return self._won(*fallback)
+        raise NoProviderAvailable(errors)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"mode": self.mode, "order": self.order, "served": self.served, "failures": self.failures}
@@ -11,8 +11,9 @@ Model name is converted to lowercase for the collection name:
 - BlogPost -> "blogs" collection
 """
 
+from datetime import datetime
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 
 # Example schemas (replace with your own):
 
@@ -41,6 +42,33 @@ class Product(BaseModel):
 # Add your own schemas here:
 # --------------------------------------------------
 
+class Ranking(BaseModel):
+    """
+    ICC rankings snapshot, one document per format
+    Collection name: "ranking" (lowercase of class name)
+    """
+    format: str = Field(..., description="test, odi or t20")
+    teams: list = Field(default_factory=list, description="Team rankings as returned by ICC")
+    players: dict = Field(default_factory=dict, description="batting/bowling/allrounder player rankings")
+    partial: bool = Field(False, description="Whether some sections are missing from the last refresh")
+    missing: List[str] = Field(default_factory=list, description="Sections missing from the last refresh")
+    fetched_at: Optional[datetime] = Field(None, description="When the snapshot was fetched from ICC")
+
+class News(BaseModel):
+    """
+    Archived RSS news items, one document per deduplicated story
+    Collection name: "news" (lowercase of class name)
+    """
+    key: str = Field(..., description="Dedupe key derived from link/GUID/title")
+    title: Optional[str] = Field(None, description="Headline")
+    link: Optional[str] = Field(None, description="Story URL")
+    guid: Optional[str] = Field(None, description="Feed GUID")
+    summary: str = Field("", description="Summary or description from the feed")
+    published: Optional[str] = Field(None, description="Published date as given by the feed")
+    published_ts: float = Field(0.0, description="Published time as a UNIX timestamp")
+    source: Optional[str] = Field(None, description="Feed title")
+    image: Optional[str] = Field(None, description="Thumbnail URL")
+
 # Note: The Flames database viewer will automatically:
 # 1. Read these schemas from GET /schema endpoint
 # 2. Use them for document validation when creating/editing
@@ -0,0 +1,99 @@
+"""
+In-Memory Full-Text Search
+
+Inverted index with BM25 ranking used for /api/news/search. Documents are
+added incrementally as the news aggregator ingests new items, so a query
+only touches the posting lists of its own terms instead of re-scanning every
+feed entry or running a Mongo regex over the archive.
+
+Memory is bounded by `max_docs`: once full, the oldest indexed documents are
+evicted and their postings removed, so term statistics always describe the
+documents that can actually be returned.
+"""
+
+import heapq
+import math
+import re
+from collections import Counter, OrderedDict
+from typing import Any, Dict, Hashable, List, Tuple
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_TAG = re.compile(r"<[^>]+>")
+
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have he her his in is it its of on or "
+    "she that the their they this to was were will with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens without HTML tags or stopwords"""
+    return [t for t in _TOKEN.findall(_TAG.sub(" ", text or "").lower()) if t not in STOPWORDS]
+
+
+class InvertedIndex:
+    """BM25-ranked inverted index over at most `max_docs` documents"""
+
+    def __init__(self, max_docs: int = 5000, k1: float = 1.2, b: float = 0.75):
+        self.max_docs = max_docs
+        self.k1 = k1
+        self.b = b
+        # doc id -> (document, term frequencies, length), oldest first
+        self._docs: "OrderedDict[Hashable, Tuple[Any, Counter, int]]" = OrderedDict()
+        # term -> {doc id: term frequency}
+        self._postings: Dict[str, Dict[Hashable, int]] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def __contains__(self, doc_id: Hashable) -> bool:
+        return doc_id in self._docs
+
+    def add(self, doc_id: Hashable, tokens: List[str], document: Any) -> bool:
+        if doc_id in self._docs or not tokens:
+            return False
+        tf = Counter(tokens)
+        self._docs[doc_id] = (document, tf, len(tokens))
+        self._total_length += len(tokens)
+        for term, count in tf.items():
+            self._postings.setdefault(term, {})[doc_id] = count
+        while len(self._docs) > self.max_docs:
+            self.remove(next(iter(self._docs)))
+        return True
+
+    def remove(self, doc_id: Hashable):
+        entry = self._docs.pop(doc_id, None)
+        if entry is None:
+            return
+        _, tf, length = entry
+        self._total_length -= length
+        for term in tf:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[float, Any]]:
+        """Top `limit` (score, document) pairs for the query, best first"""
+        terms = set(tokenize(query))
+        n = len(self._docs)
+        if not terms or not n:
+            return []
+        avg_length = self._total_length / n
+        scores: Dict[Hashable, float] = {}
+        for term in terms:
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, freq in postings.items():
+                length = self._docs[doc_id][2]
+                norm = freq + self.k1 * (1 - self.b + self.b * length / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * freq * (self.k1 + 1) / norm
+        best = heapq.nlargest(limit, scores.items(), key=lambda kv: kv[1])
+        return [(score, self._docs[doc_id][0]) for doc_id, score in best]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"docs": len(self._docs), "max_docs": self.max_docs, "terms": len(self._postings)}
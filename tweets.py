@@ -0,0 +1,150 @@
+"""
+Tweet Search Cache
+
+Caches X API v2 `search/recent` results per query so many viewers of the
+same player handle share one upstream call. Each query keeps a bounded ring
+buffer of its newest tweets; once the buffer is older than TWEETS_TTL the
+next reader triggers an incremental refresh with `since_id`, so only tweets
+newer than the buffer are fetched and merged in. Concurrent refreshes of a
+query are coalesced into one request, and if X fails or the X rate budget
+(ratelimit.py) is spent the buffered tweets are served instead of an error.
+"""
+
+import logging
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+from ratelimit import budget
+from upstream import AsyncSingleFlight, http_get_async
+
+logger = logging.getLogger(__name__)
+
+X_SEARCH_URL = os.getenv("X_SEARCH_URL", "https://api.twitter.com/2/tweets/search/recent")
+TWEETS_TTL = float(os.getenv("TWEETS_TTL", "60"))
+# Tweets kept per query, newest first
+TWEETS_BUFFER = int(os.getenv("TWEETS_BUFFER", "50"))
+TWEETS_MAX_QUERIES = int(os.getenv("TWEETS_MAX_QUERIES", "256"))
+# max_results per request (X accepts 10-100) and pages followed per refresh
+TWEETS_PER_FETCH = int(os.getenv("TWEETS_PER_FETCH", "10"))
+TWEETS_MAX_PAGES = int(os.getenv("TWEETS_MAX_PAGES", "3"))
+
+Tweet = Dict[str, Any]
+
+
+def normalize_query(query: str) -> str:
+    # Only collapse spacing: case matters to X (OR is an operator only in uppercase),
+    # and the normalized string is also what gets sent, so key and query agree
+    return " ".join(query.split())
+
+
+def to_tweet(t: Dict[str, Any]) -> Tweet:
+    return {
+        "id": t.get("id"),
+        "text": t.get("text"),
+        "created_at": t.get("created_at"),
+        "metrics": t.get("public_metrics", {}),
+    }
+
+
+class TweetBuffer:
+    """Newest tweets for one query"""
+
+    def __init__(self, size: int):
+        self.tweets: Deque[Tweet] = deque(maxlen=size)
+        self.newest_id: Optional[str] = None
+        self.fetched_at: Optional[float] = None
+
+    def merge(self, tweets: List[Tweet]) -> int:
+        """Prepend tweets newer than the buffer; `tweets` is newest first as X returns them"""
+        new = [t for t in tweets if t.get("id") and (self.newest_id is None or int(t["id"]) > int(self.newest_id))]
+        for tweet in reversed(new):
+            self.tweets.appendleft(tweet)
+        if new:
+            self.newest_id = new[0]["id"]
+        return len(new)
+
+
+class TweetCache:
+    """Per-query tweet buffers refreshed incrementally with since_id"""
+
+    def __init__(self, token: str, ttl: float = TWEETS_TTL, buffer_size: int = TWEETS_BUFFER,
+                 max_queries: int = TWEETS_MAX_QUERIES):
+        self.token = token
+        self.ttl = ttl
+        self.buffer_size = buffer_size
+        self.max_queries = max_queries
+        self._buffers: "OrderedDict[str, TweetBuffer]" = OrderedDict()
+        self._flights = AsyncSingleFlight()
+        self.upstream_calls = 0
+        self.served_stale = 0
+
+    def _buffer(self, key: str) -> TweetBuffer:
+        buffer = self._buffers.get(key)
+        if buffer is None:
+            buffer = self._buffers[key] = TweetBuffer(self.buffer_size)
+            while len(self._buffers) > self.max_queries:
+                self._buffers.popitem(last=False)
+        self._buffers.move_to_end(key)
+        return buffer
+
+    async def _search(self, query: str, since_id: Optional[str]) -> List[Tweet]:
+        headers = {"Authorization": f"Bearer {self.token}"}
+        params: Dict[str, Any] = {"query": query, "tweet.fields": "created_at,public_metrics", "max_results": TWEETS_PER_FETCH}
+        if since_id:
+            params["since_id"] = since_id
+        tweets: List[Tweet] = []
+        for _ in range(max(1, TWEETS_MAX_PAGES if since_id else 1)):
+            await budget("x").acquire()
+            self.upstream_calls += 1
+            r = await http_get_async(X_SEARCH_URL, headers=headers, params=params, timeout=15)
+            budget("x").observe(r.status_code, r.headers)
+            if r.status_code != 200:
+                raise HTTPException(status_code=r.status_code, detail=r.text[:200])
+            data = r.json()
+            tweets.extend(to_tweet(t) for t in data.get("data", []))
+            next_token = (data.get("meta") or {}).get("next_token")
+            if not next_token:
+                break
+            params["next_token"] = next_token
+        return tweets
+
+    async def _refresh(self, query: str, buffer: TweetBuffer):
+        try:
+            tweets = await self._search(query, buffer.newest_id)
+        except HTTPException as e:
+            if e.status_code != 400 or buffer.newest_id is None:
+                raise
+            # since_id outside the search window; start the buffer over
+            buffer.tweets.clear()
+            buffer.newest_id = None
+            tweets = await self._search(query, None)
+        buffer.merge(tweets)
+        buffer.fetched_at = time.monotonic()
+
+    async def get(self, query: str) -> Tuple[List[Tweet], float, str]:
+        """Return (tweets newest first, age_seconds, state) with state HIT, MISS or STALE"""
+        key = normalize_query(query)
+        buffer = self._buffer(key)
+        if buffer.fetched_at is not None and time.monotonic() - buffer.fetched_at < self.ttl:
+            return list(buffer.tweets), time.monotonic() - buffer.fetched_at, "HIT"
+        try:
+            await self._flights.do(key, lambda: self._refresh(key, buffer))
+        except Exception as e:
+            if buffer.fetched_at is None:
+                raise
+            logger.warning("tweet refresh for %r failed, serving buffer: %s", key, str(getattr(e, "detail", None) or e)[:200])
+            self.served_stale += 1
+            return list(buffer.tweets), time.monotonic() - buffer.fetched_at, "STALE"
+        return list(buffer.tweets), 0.0, "MISS"
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queries": len(self._buffers),
+            "max_queries": self.max_queries,
+            "upstream_calls": self.upstream_calls,
+            "served_stale": self.served_stale,
+        }
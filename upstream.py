@@ -0,0 +1,390 @@
+"""
+Upstream HTTP Client
+
+Shared, pooled HTTP sessions for every call the backend makes to third-party
+providers (SportMonks, Cricbuzz via RapidAPI, ICC rankings, X search).
+
+One requests.Session (sync) and one httpx.AsyncClient (async) is kept per
+scheme+host so each provider gets its own keep-alive connection pool and
+repeated calls skip DNS, TCP and TLS setup. The async clients are what the
+FastAPI handlers use, so slow upstream calls never occupy a worker thread.
+
+http_get_conditional remembers ETag / Last-Modified validators per URL and
+sends If-None-Match / If-Modified-Since; on 304 Not Modified it returns the
+result parsed from the last 200, skipping both the download and the parse.
+The kept results are bounded by count and by total body bytes
+(UPSTREAM_VALIDATOR_MAX_BYTES); a body larger than an eighth of that is not
+kept, so its URL is fetched unconditionally.
+parse_json keeps the body's byte length on the parsed object (JSONBody.size)
+so caches can weigh payloads without serializing them again.
+
+SingleFlight / AsyncSingleFlight coalesce concurrent identical calls: the
+first caller for a key runs the fetch and every caller that arrives while it
+is in flight receives the same result (or exception).
+
+Hedging (off unless UPSTREAM_HEDGE=1) targets tail latency: every async GET
+records its latency per host, and a hedged call that has not answered by the
+host's observed p95 fires one identical second request and takes whichever
+finishes first. Hedges are capped at UPSTREAM_HEDGE_MAX_RATIO of calls per
+host, and callers can veto each hedge (e.g. when the provider's rate budget
+is low), so quota use grows by a few percent at most.
+
+Pool sizes and keep-alive are configured through environment variables:
+
+- UPSTREAM_POOL_CONNECTIONS: number of connection pools cached per session
+- UPSTREAM_POOL_MAXSIZE: max idle connections kept open per host
+- UPSTREAM_MAX_CONNECTIONS: max concurrent async connections per host
+- UPSTREAM_KEEPALIVE: set to 0 to close connections after every request
+- UPSTREAM_TIMEOUT: default request timeout in seconds
+- UPSTREAM_HEDGE: set to 1 to enable hedged requests
+- UPSTREAM_HEDGE_MAX_RATIO: max share of calls per host that may be hedged
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+POOL_CONNECTIONS = int(os.getenv("UPSTREAM_POOL_CONNECTIONS", "4"))
+POOL_MAXSIZE = int(os.getenv("UPSTREAM_POOL_MAXSIZE", "32"))
+KEEPALIVE = os.getenv("UPSTREAM_KEEPALIVE", "1").lower() not in ("0", "false", "no")
+MAX_CONNECTIONS = int(os.getenv("UPSTREAM_MAX_CONNECTIONS", "1000"))
+DEFAULT_TIMEOUT = float(os.getenv("UPSTREAM_TIMEOUT", "15"))
+VALIDATOR_CACHE_SIZE = int(os.getenv("UPSTREAM_VALIDATOR_CACHE_SIZE", "256"))
+VALIDATOR_MAX_BYTES = int(os.getenv("UPSTREAM_VALIDATOR_MAX_BYTES", str(16 * 1024 * 1024)))
+HEDGE_ENABLED = os.getenv("UPSTREAM_HEDGE", "0").lower() in ("1", "true", "yes")
+HEDGE_MAX_RATIO = float(os.getenv("UPSTREAM_HEDGE_MAX_RATIO", "0.05"))
+HEDGE_QUANTILE = float(os.getenv("UPSTREAM_HEDGE_QUANTILE", "0.95"))
+# Latency samples kept per host, and how many are needed before hedging
+HEDGE_WINDOW = int(os.getenv("UPSTREAM_HEDGE_WINDOW", "200"))
+HEDGE_MIN_SAMPLES = int(os.getenv("UPSTREAM_HEDGE_MIN_SAMPLES", "20"))
+
+# True to hedge, or a predicate checked right before each hedge is sent
+Hedge = Union[bool, Callable[[], bool]]
+
+_sessions: Dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+_async_clients: Dict[str, httpx.AsyncClient] = {}
+# request key -> (etag, last_modified, parsed result), least recently used first
+# key -> (etag, last_modified, parsed, body bytes)
+_validators: "OrderedDict[Hashable, Tuple[Optional[str], Optional[str], Any, int]]" = OrderedDict()
+_validator_bytes = 0
+_conditional_stats = {"requests": 0, "not_modified": 0}
+
+
+def _host_key(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def _new_session() -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    if not KEEPALIVE:
+        session.headers["Connection"] = "close"
+    return session
+
+
+def get_session(url: str) -> requests.Session:
+    """Return the pooled session for the host of `url`, creating it on first use"""
+    key = _host_key(url)
+    session = _sessions.get(key)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(key)
+            if session is None:
+                session = _new_session()
+                _sessions[key] = session
+    return session
+
+
+def http_get(url: str, params: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None, timeout: Optional[float] = None) -> requests.Response:
+    """GET `url` through the host's pooled session"""
+    return get_session(url).get(url, params=params, headers=headers, timeout=timeout or DEFAULT_TIMEOUT)
+
+
+def close_sessions():
+    """Close every pooled session (used on shutdown and by benchmarks)"""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+def _new_async_client() -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=MAX_CONNECTIONS,
+        max_keepalive_connections=POOL_MAXSIZE if KEEPALIVE else 0,
+    )
+    return httpx.AsyncClient(limits=limits, timeout=DEFAULT_TIMEOUT, follow_redirects=True)
+
+
+def get_async_client(url: str) -> httpx.AsyncClient:
+    """Return the pooled async client for the host of `url`, creating it on first use"""
+    key = _host_key(url)
+    client = _async_clients.get(key)
+    if client is None or client.is_closed:
+        client = _new_async_client()
+        _async_clients[key] = client
+    return client
+
+
+class HostLatency:
+    """Recent request latencies for one host"""
+
+    def __init__(self, window: int = HEDGE_WINDOW):
+        self.samples: Deque[float] = deque(maxlen=window)
+        self._quantile: Optional[float] = None
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+        self._quantile = None
+
+    def quantile(self, q: float) -> Optional[float]:
+        if len(self.samples) < HEDGE_MIN_SAMPLES:
+            return None
+        if self._quantile is None:
+            ordered = sorted(self.samples)
+            self._quantile = ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+        return self._quantile
+
+
+_latency: Dict[str, HostLatency] = {}
+
+
+def _host_latency(url: str) -> HostLatency:
+    key = _host_key(url)
+    stats = _latency.get(key)
+    if stats is None:
+        stats = _latency[key] = HostLatency()
+    return stats
+
+
+async def _timed_get(client: httpx.AsyncClient, stats: HostLatency, url: str, **kwargs: Any) -> httpx.Response:
+    started = time.monotonic()
+    r = await client.get(url, **kwargs)
+    stats.record(time.monotonic() - started)
+    return r
+
+
+async def _hedged(stats: HostLatency, send: Callable[[], Awaitable[httpx.Response]], hedge: Hedge) -> httpx.Response:
+    delay = stats.quantile(HEDGE_QUANTILE)
+    first = asyncio.ensure_future(send())
+    if delay is None:
+        return await first
+    pending = {first}
+    try:
+        done, _ = await asyncio.wait(pending, timeout=delay)
+        if done or stats.hedged >= HEDGE_MAX_RATIO * stats.calls or (callable(hedge) and not hedge()):
+            return await first
+        stats.hedged += 1
+        second = asyncio.ensure_future(send())
+        pending.add(second)
+        while True:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            ok = [task for task in done if task.exception() is None]
+            if ok or not pending:
+                # First success wins; if both failed, surface the last error
+                winner = (ok or list(done))[0]
+                if winner is second:
+                    stats.hedge_wins += 1
+                return winner.result()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def http_get_async(url: str, params: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None,
+                         timeout: Optional[float] = None, hedge: Hedge = False) -> httpx.Response:
+    """GET `url` through the host's pooled async client, hedged past the host's p95 if `hedge`"""
+    client = get_async_client(url)
+    stats = _host_latency(url)
+    stats.calls += 1
+
+    def send() -> Awaitable[httpx.Response]:
+        return _timed_get(client, stats, url, params=params, headers=headers, timeout=timeout or DEFAULT_TIMEOUT)
+
+    if hedge and HEDGE_ENABLED:
+        return await _hedged(stats, send, hedge)
+    return await send()
+
+
+def hedge_stats() -> Dict[str, Any]:
+    return {
+        host: {
+            "calls": s.calls,
+            "hedged": s.hedged,
+            "hedge_wins": s.hedge_wins,
+            "p95_ms": None if s.quantile(HEDGE_QUANTILE) is None else round(s.quantile(HEDGE_QUANTILE) * 1000, 1),
+        }
+        for host, s in _latency.items()
+    }
+
+
+async def http_get_conditional(url: str, parse: Callable[[bytes], Any], params: Optional[Dict[str, Any]] = None,
+                               headers: Optional[Dict[str, str]] = None, timeout: Optional[float] = None,
+                               offload: bool = False, hedge: Hedge = False) -> Tuple[httpx.Response, Any]:
+    """Conditional GET returning (response, parsed).
+
+    `parsed` is parse(body) for a 200, the previously parsed result for a 304,
+    and None for any other status. With `offload` the parse runs in a thread.
+    `hedge` is passed through to http_get_async.
+    """
+    key = flight_key(url, params=params)
+    entry = _validators.get(key)
+    request_headers = dict(headers or {})
+    if entry is not None:
+        etag, last_modified, _, _ = entry
+        if etag:
+            request_headers["If-None-Match"] = etag
+        if last_modified:
+            request_headers["If-Modified-Since"] = last_modified
+    _conditional_stats["requests"] += 1
+    r = await http_get_async(url, params=params, headers=request_headers, timeout=timeout, hedge=hedge)
+    if r.status_code == 304 and entry is not None:
+        _conditional_stats["not_modified"] += 1
+        _validators.move_to_end(key)
+        return r, entry[2]
+    if r.status_code != 200:
+        return r, None
+    parsed = await asyncio.to_thread(parse, r.content) if offload else parse(r.content)
+    etag, last_modified = r.headers.get("ETag"), r.headers.get("Last-Modified")
+    _forget_validators(key)
+    size = len(r.content)
+    if (etag or last_modified) and size <= VALIDATOR_MAX_BYTES // 8:
+        _remember_validators(key, (etag, last_modified, parsed, size))
+    return r, parsed
+
+
+def _forget_validators(key: Hashable):
+    global _validator_bytes
+    entry = _validators.pop(key, None)
+    if entry is not None:
+        _validator_bytes -= entry[3]
+
+
+def _remember_validators(key: Hashable, entry: Tuple[Optional[str], Optional[str], Any, int]):
+    global _validator_bytes
+    _validators[key] = entry
+    _validator_bytes += entry[3]
+    while len(_validators) > VALIDATOR_CACHE_SIZE or _validator_bytes > VALIDATOR_MAX_BYTES:
+        _, evicted = _validators.popitem(last=False)
+        _validator_bytes -= evicted[3]
+
+
+class JSONBody(dict):
+    """Parsed JSON object that remembers the length of the upstream body"""
+
+    size = 0
+
+
+def parse_json(body: bytes) -> Any:
+    """json.loads for http_get_conditional; objects come back as JSONBody"""
+    value = json.loads(body)
+    if isinstance(value, dict):
+        value = JSONBody(value)
+        value.size = len(body)
+    return value
+
+
+def body_size(value: Any) -> int:
+    """Upstream body length of a parse_json result, 0 if unknown (cache weigher)"""
+    return getattr(value, "size", 0)
+
+
+def conditional_stats() -> Dict[str, int]:
+    return {**_conditional_stats, "validators": len(_validators), "validator_bytes": _validator_bytes}
+
+
+async def aclose_clients():
+    """Close every pooled async client (called from the app lifespan)"""
+    clients = list(_async_clients.values())
+    _async_clients.clear()
+    for client in clients:
+        await client.aclose()
+
+
+def flight_key(*parts: Any, params: Optional[Dict[str, Any]] = None) -> Hashable:
+    """Build a single-flight key from call identifiers and (unordered) query params"""
+    return parts + tuple(sorted((str(k), str(v)) for k, v in (params or {}).items()))
+
+
+class _Call:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Thread-based single-flight for the sync code paths"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+
+class AsyncSingleFlight:
+    """asyncio single-flight; the shared fetch runs as its own task so a
+    cancelled caller (client disconnect) does not cancel it for the others"""
+
+    def __init__(self):
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.get_running_loop().create_task(fn())
+            self._tasks[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        return await asyncio.shield(task)
+
+    def _done(self, key: Hashable, task: asyncio.Task):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        if not task.cancelled():
+            # Mark the error retrieved even if every waiter was cancelled first
+            task.exception()
+
+    def in_flight(self) -> int:
+        return len(self._tasks)